@@ -0,0 +1,16 @@
+"""
+Description: Python PWR Sim plant model package. The GUI in pwrsim.gui is
+a view over the headless engine in pwrsim.core. Importing the package only
+loads the engine, pwrsim.PWRSim imports the GUI (and tkinter) on first use.
+"""
+from pwrsim.state import PlantState, FIELDS, STATE_SIZE
+from pwrsim.core import PWRCore, newState, stepState, advanceState, endStats, annunciators, playGame, ANNUNCIATORS
+from pwrsim.core import REPAIRS_COMPLETE, DAMAGE_CONTROL_RECALLED, PLANT_DESTROYED
+from pwrsim.core import DAMAGE_CONTROL_ACTIVATED, DAMAGE_CONTROL_DEACTIVATED, CORE_TOO_HOT
+
+
+def __getattr__(name):  #lazy import so headless users never load the GUI or tkinter
+    if name == 'PWRSim':
+        from pwrsim.gui import PWRSim
+        return PWRSim
+    raise AttributeError("module 'pwrsim' has no attribute " + repr(name))
@@ -0,0 +1,9 @@
+"""
+Description: python -m pwrsim starts the GUI game, same options as the
+NRSGUI launcher (--record, --profile, --trace, --history).
+"""
+import sys
+from pwrsim.gui import main
+
+if __name__ == '__main__':
+    sys.exit(main())
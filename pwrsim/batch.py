@@ -0,0 +1,234 @@
+"""
+Description: NumPy batch engine for the Python PWR Sim. Holds N plants in
+one structured array (one record per plant, same fields as rState) and
+steps all of them with a single vectorized call. The branches in
+core.stepState become boolean masks, and every float operation is done
+in the same order as the scalar path so each plant ends up bit-for-bit
+equal to stepping it with core.stepState.
+
+Plants that are destroyed (damage >= 100), SCRAMed or whose day counter
+is up are frozen and skipped by step(), the same point where the GUI ends
+the game.
+
+Requires numpy. Run this file (python -m pwrsim.batch) for a throughput
+benchmark in plant-days per second.
+
+Classes:
+    BatchPWR(n, gameLength)
+        Description: N plants stepped together
+        Methods:
+            step(rodPosition, pPump, sPump, ePump):
+                Description: Advance every active plant one day, controls are scalars or length N arrays
+                Returns: dict of event string -> length N bool mask
+            toggleDamageControl(mask):
+                Returns: dict of damage control event string -> length N bool mask
+            active():
+                Returns: bool mask of plants that are still playing
+            reset(mask):
+                Description: Start a new game for every plant in mask, or all of them
+            toState(i) / fromStates(states):
+                Description: convert between plant records and PlantState objects, fromStates needs states of one game length
+Functions:
+    endStats(plants): Returns dict of endStats field -> array for a block of plant records, same operation order as core.endStats
+    verify(n, gameLength, seed): Steps random schedules through both engines, returns number of mismatched plants
+    benchmark(n, gameLength): Returns plant-days per second for the batch and scalar engines
+"""
+import random
+import struct
+import time
+
+import numpy as np
+
+from pwrsim import core
+from pwrsim.state import PlantState
+
+PLANT_DTYPE = np.dtype([('rodPosition', 'i8'), ('pPump', 'i8'), ('sPump', 'i8'), ('ePump', 'i8'),
+    ('rTemp', 'f8'), ('eTemp', 'f8'), ('cTemp', 'f8'), ('damage', 'i8'), ('fuel', 'f8'),
+    ('dailyOutput', 'f8'), ('totalOutput', 'f8'), ('day', 'i8'), ('damageControl', '?'),
+    ('scram', '?'), ('gameLength', 'i8')])
+
+
+def rtrMap(val, inMin, inMax, outMin, outMax):  #same operation order as core.rtrMap so results match bit for bit
+    return ((val - inMin) * (outMax - outMin) / (inMax - inMin) + outMin)
+
+def stepArrays(p, rod, pPump, sPump, ePump):    #advance a block of plant records one day, returns event masks
+    p['rodPosition'] = rod
+    p['pPump'] = pPump
+    p['sPump'] = sPump
+    p['ePump'] = ePump
+
+    rTemp = p['rTemp']
+    damage = p['damage']
+    fuel = p['fuel']
+    flow = pPump + ePump
+
+    turbineEfficiency = 0.83 - (damage / 200)
+
+    #reactor heat term, same terms as core.stepState
+    heating = (rTemp/600) * (rtrMap(rod, 0, 100, -100, 100) + rtrMap(fuel, 0, 100, -150, 70) + damage)
+    rTempDelta = np.where(rod > 0, heating, np.where(rTemp > 70, -2.0, 0.0))
+
+    #coolant flow correction, heating and cooling share the same correction
+    highFlow = flow > 50
+    flowDelta = np.where(highFlow, rTempDelta - rtrMap(flow, 50, 200, 5, 25), rTempDelta + rtrMap(flow, 0, 50, 25, 5))
+    moving = rTempDelta != 0
+    stable = (~moving) & (rTemp == 70)  #reactor off and cold
+    nudge = np.where((pPump > 20) | (ePump > 40), rTempDelta - 2, rTempDelta + 2)
+    rTempDelta = np.where(moving, flowDelta, np.where(stable, rTempDelta, nudge))
+
+    rTemp = rTemp + rTempDelta
+    eTemp = rTemp - (sPump * 1.5)
+    p['dailyOutput'] = np.where(eTemp >= 212, eTemp * 1.4, p['dailyOutput'])
+    cTemp = eTemp - (eTemp * turbineEfficiency)
+
+    #ambient floors
+    rTemp = np.where(rTemp < 70, 70.0, rTemp)
+    eTemp = np.where(eTemp < 80, 80.0, eTemp)
+    cTemp = np.where(cTemp < 80, 80.0, cTemp)
+
+    #Damage logic block, np.rint rounds half to even like the builtin round
+    damage = damage + np.where(rTemp > 700, np.rint((rTemp - 700) / 50).astype(np.int64) + 1, 0)
+    damage = damage + np.where(eTemp > 450, np.rint((eTemp - 450) / 50).astype(np.int64), 0)
+    damage = damage + np.where(cTemp > 212, np.rint((cTemp - 212) / 50).astype(np.int64), 0)
+
+    damageControl = p['damageControl']
+    crewsSafe = rTemp < 212
+    damage = damage - np.where(damageControl & crewsSafe & (damage > 0), 2, 0)
+    repaired = damageControl & crewsSafe & (damage == 0)
+    recalled = damageControl & ~crewsSafe
+    p['damageControl'] = damageControl & ~(repaired | recalled)
+
+    p['rTemp'] = rTemp
+    p['eTemp'] = eTemp
+    p['cTemp'] = cTemp
+    p['damage'] = damage
+    p['totalOutput'] += p['dailyOutput']
+    p['fuel'] -= rod / 150
+    p['day'] += 1
+
+    return {core.REPAIRS_COMPLETE:repaired, core.DAMAGE_CONTROL_RECALLED:recalled, core.PLANT_DESTROYED:damage >= 100}
+
+
+class BatchPWR():
+    def __init__(self, n, gameLength=100):
+        self.plants = np.zeros(n, dtype=PLANT_DTYPE)
+        self.start = np.array(core.newState(gameLength).astuple(), dtype=PLANT_DTYPE)     #record for a new game
+        self.plants[:] = self.start
+
+    def __len__(self):
+        return len(self.plants)
+
+    def active(self):   #plants that are not destroyed, SCRAMed or out of days
+        return (self.plants['damage'] < 100) & ~self.plants['scram'] & (self.plants['day'] < self.plants['gameLength'])
+
+    def reset(self, mask=None):
+        if mask is None:
+            self.plants[:] = self.start
+        else:
+            self.plants[np.asarray(mask, dtype=bool)] = self.start
+
+    def step(self, rodPosition, pPump, sPump, ePump):
+        n = len(self.plants)
+        controls = [np.broadcast_to(np.asarray(c, dtype=np.int64), (n,)) for c in (rodPosition, pPump, sPump, ePump)]
+        active = self.active()
+        events = {core.REPAIRS_COMPLETE:np.zeros(n, bool), core.DAMAGE_CONTROL_RECALLED:np.zeros(n, bool), core.PLANT_DESTROYED:np.zeros(n, bool)}
+
+        with np.errstate(all='ignore'):     #masked out lanes are allowed to overflow
+            if active.all():    #skip the gather/scatter when every plant is still playing
+                blockEvents = stepArrays(self.plants, *controls)
+                for name in events:
+                    events[name] = blockEvents[name]
+            elif active.any():
+                idx = np.flatnonzero(active)
+                block = self.plants[idx]
+                blockEvents = stepArrays(block, *[c[idx] for c in controls])
+                self.plants[idx] = block
+                for name in events:
+                    events[name][idx] = blockEvents[name]
+        return events
+
+    def toggleDamageControl(self, mask):    #same rules as PWRCore.toggleDamageControl for every plant in mask
+        mask = np.asarray(mask, dtype=bool)
+        on = self.plants['damageControl']
+        cool = self.plants['rTemp'] < 212.0
+        deactivated = mask & on
+        activated = mask & ~on & cool
+        tooHot = mask & ~on & ~cool
+        self.plants['damageControl'] = (on & ~deactivated) | activated
+        return {core.DAMAGE_CONTROL_DEACTIVATED:deactivated, core.DAMAGE_CONTROL_ACTIVATED:activated, core.CORE_TOO_HOT:tooHot}
+
+    def toState(self, i):   #PlantState for plant i
+        return PlantState.fromTuple(self.plants[i].item())
+
+    @classmethod
+    def fromStates(cls, states):    #reset() starts new games of the states' own length, so they have to share one
+        lengths = set(rState['gameLength'] for rState in states)
+        if len(lengths) > 1:
+            raise ValueError('states have different game lengths ' + str(sorted(lengths)) + ', a batch plays one length')
+        batch = cls(len(states), lengths.pop() if lengths else 100)
+        for i, rState in enumerate(states):
+            batch.plants[i] = tuple(rState[field] for field in PLANT_DTYPE.names)
+        return batch
+
+
+def endStats(plants):
+    profit = plants['totalOutput'] * 1000 * 0.14
+    losses = (100 - plants['fuel']) * 1000
+    damageCost = np.where(plants['damage'] < 100, plants['damage'] * 1000, 2000000000)
+    trueLosses = losses + damageCost
+    return {'Profit':profit, 'Losses':losses, 'DamageCost':damageCost, 'TrueLosses':trueLosses, 'TrueProfit':profit - trueLosses}
+
+def sameBits(a, b):     #compare two field values bit for bit
+    if isinstance(a, float) or isinstance(b, float):
+        return struct.pack('<d', a) == struct.pack('<d', b)
+    return a == b
+
+def verify(n=1000, gameLength=150, seed=0):
+    rng = random.Random(seed)
+    schedule = [[(rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100)) for i in range(n)] for day in range(gameLength)]
+    toggles = [[rng.random() < 0.05 for i in range(n)] for day in range(gameLength)]
+
+    batch = BatchPWR(n, gameLength)
+    for day in range(gameLength):
+        batch.toggleDamageControl(np.array(toggles[day]) & batch.active())
+        batch.step(*np.array(schedule[day]).T)
+
+    mismatched = 0
+    for i in range(n):
+        plant = core.PWRCore(gameLength)
+        for day in range(gameLength):
+            if plant.isOver() or plant.rState['damage'] >= 100:
+                break
+            if toggles[day][i]:
+                plant.toggleDamageControl()
+            plant.step(*schedule[day][i])
+        result = batch.toState(i)
+        if not all(sameBits(plant.rState[field], result[field]) for field in PLANT_DTYPE.names):
+            mismatched += 1
+    return mismatched
+
+def benchmark(n=10000, gameLength=150):
+    controls = (15, 100, 100, 0)    #safe start from help()
+
+    batch = BatchPWR(n, gameLength)
+    start = time.perf_counter()
+    for day in range(gameLength - 1):
+        batch.step(*controls)
+    batchRate = n * (gameLength - 1) / (time.perf_counter() - start)
+
+    scalarPlants = max(1, n // 100)
+    start = time.perf_counter()
+    for i in range(scalarPlants):
+        rState = core.newState(gameLength)
+        for day in range(gameLength - 1):
+            core.stepState(rState, *controls)
+    scalarRate = scalarPlants * (gameLength - 1) / (time.perf_counter() - start)
+
+    return batchRate, scalarRate
+
+
+if __name__ == '__main__':
+    print('verify: ' + str(verify()) + ' mismatched plants')
+    for n in (1000, 10000, 100000):
+        batchRate, scalarRate = benchmark(n)
+        print(format(n, '>7') + ' plants: batch ' + format(batchRate, ',.0f') + ' plant-days/s, scalar ' + format(scalarRate, ',.0f') + ' plant-days/s')
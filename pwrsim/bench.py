@@ -0,0 +1,333 @@
+"""
+Description: Benchmark suite for the Python PWR Sim hot paths. Times each
+case one operation at a time and reports throughput, latency percentiles
+and memory per operation, and can save the results as a baseline and fail
+later runs that are slower than it.
+
+Cases:
+    step        one day of updatePlantState physics (PWRCore.step) at the help() safe start
+    game150     a full 150 day game played day by day at 15% rods, 100% pumps
+    game150Held the same game through the held controls fast path (playGame with one tuple)
+    game150Cached the day by day game through a warm exact TransitionCache
+    entries     PWRSim.updateEntries parsing the four control entry fields
+    trend       one day added to and drawn on a TrendChart, on a stand in canvas so it runs anywhere
+    refresh     one day plus PWRSim.refresh (labels, annunciators and trend chart) on real Tk widgets.
+                With no DISPLAY set it starts its own Xvfb server, and is only skipped when Xvfb is not installed
+    startup     import pwrsim in a fresh interpreter, timed inside the child so interpreter start up
+                is left out. Fails the run if tkinter gets loaded or the median is over --import-budget ms
+
+Memory columns, from a tracemalloc pass over the case: kept/op is the
+number of memory blocks allocated during the pass and still alive at its end per
+operation (the count_diff total of a snapshot diff, anything above 0 is
+kept around), peakB/op is the mean extra peak traced memory during one
+operation.
+
+Usage:
+    python -m pwrsim.bench
+    python -m pwrsim.bench --save baseline.json
+    python -m pwrsim.bench --compare baseline.json --threshold 0.10
+    python -m pwrsim.bench startup --import-budget 5
+
+Functions:
+    measure(name, op, count, warmup): Times op count times, returns result dict
+    measureStartup(count): Times the engine import in count fresh interpreters, returns result dict
+    runBenchmarks(names, scale): Runs the named cases, returns dict of name -> result dict
+    compare(results, baseline, threshold): Returns list of (name, ratio) for every case slower than baseline by more than threshold
+    main(argv): Command line entry point, returns 0 on good execution, 1 on a regression
+"""
+import argparse
+import atexit
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from pwrsim import core
+from pwrsim.cache import TransitionCache
+from pwrsim.trend import TrendChart
+
+SAFE_START = (15, 100, 100, 0)  #the safe start from help(): 15% rods, 100% primary and secondary pumps
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASES = ('step', 'game150', 'game150Held', 'game150Cached', 'entries', 'trend', 'refresh', 'startup')
+STARTUP_CHILD = ('import sys, time\n'
+    'start = time.perf_counter()\n'
+    'import pwrsim\n'
+    'print(time.perf_counter() - start, "tkinter" in sys.modules)\n')
+
+
+class SkipBenchmark(Exception):     #case can not run here, e.g. no display
+    pass
+
+
+class FakeEntry():  #stands in for a Tk Entry so updateEntries can be timed without a display
+    def __init__(self, text):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+
+class FakeCanvas():     #stands in for a Tk Canvas, only keeps the item count
+    def __init__(self):
+        self.lastItem = 0
+
+    def create(self, *args, **kwargs):
+        self.lastItem += 1
+        return self.lastItem
+
+    create_line = create
+    create_text = create
+    create_rectangle = create
+
+    def coords(self, item, *args):
+        pass
+
+    def delete(self, item):
+        pass
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def measure(name, op, count, warmup=100):
+    for i in range(warmup):
+        op()
+
+    clock = time.perf_counter_ns
+    latencies = [0] * count
+    gcWasEnabled = gc.isenabled()
+    gc.collect()
+    gc.disable()    #keep collector pauses out of the latencies
+    try:
+        for i in range(count):
+            start = clock()
+            op()
+            latencies[i] = clock() - start
+    finally:
+        if gcWasEnabled:
+            gc.enable()
+
+    memoryOps = min(count, 1000)    #tracemalloc slows everything down so memory gets its own short pass
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peakTotal = 0
+    for i in range(memoryOps):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        op()
+        peakTotal += tracemalloc.get_traced_memory()[1] - current
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]  #the snapshots themselves
+    kept = sum(stat.count_diff for stat in after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'filename'))
+
+    return summarize(name, latencies, kept / memoryOps, peakTotal / memoryOps)
+
+def summarize(name, latencies, keptBlocks, peakBytes):    #result dict from per op times in ns
+    total = sum(latencies)
+    latencies = sorted(latencies)
+    return {'name':name, 'ops':len(latencies), 'opsPerSec':len(latencies) / (total / 1e9) if total else 0.0,
+        'p50us':percentile(latencies, 0.50) / 1000, 'p90us':percentile(latencies, 0.90) / 1000,
+        'p99us':percentile(latencies, 0.99) / 1000, 'maxus':latencies[-1] / 1000,
+        'keptBlocksPerOp':keptBlocks, 'peakBytesPerOp':peakBytes}
+
+def measureStartup(count):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = PACKAGE_ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    latencies = []
+    tkinterLoaded = False
+    for i in range(count + 1):
+        output = subprocess.run([sys.executable, '-c', STARTUP_CHILD], env=env, check=True, capture_output=True, text=True).stdout.split()
+        if i > 0:   #the first run may be compiling bytecode
+            latencies.append(int(float(output[0]) * 1e9))
+        tkinterLoaded = tkinterLoaded or output[1] == 'True'
+    result = summarize('startup', latencies, 0.0, 0.0)
+    result['tkinterLoaded'] = tkinterLoaded
+    return result
+
+def startXvfb():    #runs a private X server for the GUI cases, returns its display name
+    read, write = os.pipe()
+    server = subprocess.Popen(['Xvfb', '-displayfd', str(write), '-nolisten', 'tcp'], pass_fds=(write,),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write)
+    with os.fdopen(read) as f:  #Xvfb writes the display number it picked once it is ready
+        number = f.readline().strip()
+    if not number:
+        server.kill()
+        raise SkipBenchmark('Xvfb did not start')
+    atexit.register(server.terminate)
+    return ':' + number
+
+def loadGui():
+    try:
+        from pwrsim import gui
+    except ImportError as err:
+        raise SkipBenchmark('GUI unavailable: ' + str(err))
+    return gui
+
+def stepCase():
+    plant = core.PWRCore(150)
+    def op():
+        if plant.isOver():  #start a new game rather than stepping past the end
+            plant.rState = core.newState(150)
+        plant.step(*SAFE_START)
+    return op
+
+def gameCase():
+    schedule = [SAFE_START] * 149
+    def op():
+        core.playGame(150, schedule)
+    return op
+
+def heldGameCase():
+    def op():
+        core.playGame(150, SAFE_START)
+    return op
+
+def cachedGameCase():
+    schedule = [SAFE_START] * 149
+    transitions = TransitionCache(10000)
+    def op():
+        core.playGame(150, schedule, transitions)
+    return op
+
+def entriesCase():
+    gui = loadGui()
+    view = gui.PWRSim.__new__(gui.PWRSim)
+    view.core = core.PWRCore(150)
+    view.rState = view.core.rState
+    view.rodEntry = FakeEntry('15')
+    view.pcEntry = FakeEntry('100')
+    view.scEntry = FakeEntry('100')
+    view.ecEntry = FakeEntry('0')
+    return view.updateEntries
+
+def trendCase():
+    plant = core.PWRCore(10**9)     #no end of game, so the chart has to keep merging buckets
+    chart = TrendChart(FakeCanvas(), 150)
+    def op():
+        plant.step(*SAFE_START)
+        chart.add(plant.rState)
+        chart.draw()
+    return op
+
+def refreshCase():
+    gui = loadGui()
+    tk = gui.loadTk()
+    if not os.environ.get('DISPLAY'):
+        if shutil.which('Xvfb') is None:
+            raise SkipBenchmark('no display and Xvfb is not installed')
+        os.environ['DISPLAY'] = startXvfb()
+    try:
+        view = gui.PWRSim(150)
+    except tk.TclError as err:
+        raise SkipBenchmark('no display: ' + str(err).splitlines()[0])
+    view.window.withdraw()
+    def op():
+        if view.core.isOver():
+            view.core.rState = core.newState(150)
+            view.rState = view.core.rState
+        view.core.step(*SAFE_START)
+        view.trend.add(view.rState)
+        view.refresh()
+        view.window.update_idletasks()  #let Tk do the redraw work the refresh queued
+    return op
+
+BUILDERS = {'step':(stepCase, 200000), 'game150':(gameCase, 500), 'game150Held':(heldGameCase, 2000),
+    'game150Cached':(cachedGameCase, 500), 'entries':(entriesCase, 100000),
+    'trend':(trendCase, 100000), 'refresh':(refreshCase, 5000)}
+MEASURED = {'startup':(measureStartup, 30)}     #cases that time themselves
+
+def runBenchmarks(names=CASES, scale=1.0, report=None):
+    results = {}
+    for name in names:
+        if name in MEASURED:
+            measurer, count = MEASURED[name]
+            results[name] = measurer(max(1, int(count * scale)))
+            if report is not None:
+                report(name, results[name], None)
+            continue
+        builder, count = BUILDERS[name]
+        try:
+            op = builder()
+        except SkipBenchmark as err:
+            if report is not None:
+                report(name, None, str(err))
+            continue
+        results[name] = measure(name, op, max(1, int(count * scale)), max(1, int(min(count, 100) * scale)))
+        if report is not None:
+            report(name, results[name], None)
+    return results
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name in baseline and baseline[name]['opsPerSec'] > 0:
+            ratio = result['opsPerSec'] / baseline[name]['opsPerSec']
+            if ratio < 1 - threshold:
+                regressions.append((name, ratio))
+    return regressions
+
+def printResult(name, result, skipped):
+    if skipped is not None:
+        print(format(name, '14s'), 'skipped,', skipped)
+        return
+    print(format(name, '14s'), format(result['opsPerSec'], '12.1f'), format(result['p50us'], '10.2f'),
+        format(result['p90us'], '10.2f'), format(result['p99us'], '10.2f'), format(result['maxus'], '10.2f'),
+        format(result['keptBlocksPerOp'], '10.3f'), format(result['peakBytesPerOp'], '10.1f'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the PWR sim hot paths.')
+    parser.add_argument('cases', nargs='*', default=list(CASES), help='cases to run (default: all of ' + ', '.join(CASES) + ')')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every case\'s operation count, e.g. 0.1 for a quick run')
+    parser.add_argument('--save', default=None, help='write the results to this JSON baseline file')
+    parser.add_argument('--compare', default=None, help='compare against this baseline and exit 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed throughput drop against the baseline (default 0.10 = 10%%)')
+    parser.add_argument('--import-budget', type=float, default=10.0, help='most milliseconds import pwrsim may take in the startup case')
+    args = parser.parse_args(argv)
+    for name in args.cases:
+        if name not in BUILDERS and name not in MEASURED:
+            parser.error('unknown case ' + name + ', pick from ' + ', '.join(CASES))
+
+    print(format('case', '14s'), format('ops/sec', '>12s'), format('p50 us', '>10s'), format('p90 us', '>10s'),
+        format('p99 us', '>10s'), format('max us', '>10s'), format('kept/op', '>10s'), format('peakB/op', '>10s'))
+    results = runBenchmarks(args.cases, args.scale, printResult)
+    failed = False
+    if 'startup' in results:
+        startup = results['startup']
+        print('Engine import takes', format(startup['p50us'] / 1000, '.2f'), 'ms, tkinter', 'loaded' if startup['tkinterLoaded'] else 'not loaded')
+        if startup['tkinterLoaded']:
+            print('FAIL: import pwrsim loaded tkinter')
+            failed = True
+        if startup['p50us'] / 1000 > args.import_budget:
+            print('FAIL: import pwrsim is over the', args.import_budget, 'ms budget')
+            failed = True
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+        print('Saved baseline to', args.save)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for name, result in results.items():
+            if name in baseline:
+                print(format(name, '14s'), format(result['opsPerSec'] / baseline[name]['opsPerSec'], '.2f') + 'x baseline throughput')
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print('REGRESSION:', name, 'is at', format(ratio * 100, '.1f') + '% of baseline throughput')
+        if regressions:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
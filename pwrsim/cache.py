@@ -0,0 +1,188 @@
+"""
+Description: Bounded transition cache for the Python PWR Sim. A day's
+physics only reads rTemp, fuel, damage, dailyOutput (kept from the last
+day the exchanger boiled), damageControl and the four controls, so the
+next state for any of those combinations can be remembered and handed
+back instead of stepping again. Sweeps and solvers revisit the same
+combinations a lot, every cold start at the 70F floor and the +-2 degree
+regimes with the rods in.
+
+fuel, totalOutput and day are always worked out from the plant's own
+values outside the cache, so in exact mode (tolerance None) a cached step
+is identical to stepState. With a tolerance the float fields in the key
+are rounded to that step and a hit hands back the temperatures,
+dailyOutput and damage of whichever state filled the entry first, which
+trades accuracy for hit rate.
+
+Usage:
+    cache = TransitionCache(100000, 'lfu')
+    plant = core.PWRCore(150, cache=cache)
+    core.playGame(150, schedule, cache)
+    cache.stats()
+    verify()    #0 when exact mode matches stepState bit for bit
+
+Classes:
+    TransitionCache(maxSize, policy, tolerance, model)
+        Description: LRU or LFU cache of day transitions, of the stock plant or of a pwrsim.config.PlantModel
+        Methods:
+            step(rState, rodPosition, pPump, sPump, ePump): Drop in for core.stepState, returns events
+            stats(): Returns dict of hits, misses, evictions, size and hitRate
+            clear(): Empties the cache and zeroes the counters
+Functions:
+    verify(games, gameLength, seed, maxSize, policy, model): Plays random games with and without an exact cache,
+        returns number of games that differ in any field or event on any day
+"""
+import random
+from collections import OrderedDict
+
+from pwrsim import core
+
+POLICIES = ('lru', 'lfu')
+
+
+class LRUStore():   #least recently used entry is evicted first
+    def __init__(self):
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+
+    def evict(self):
+        self.entries.popitem(last=False)
+
+
+class LFUStore():   #least frequently used entry is evicted first, oldest first among equals
+    def __init__(self):
+        self.entries = {}   #key -> [value, uses]
+        self.byUses = {}    #uses -> OrderedDict of keys with that many uses
+        self.minUses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        uses = entry[1]
+        keys = self.byUses[uses]
+        del keys[key]
+        if not keys:
+            del self.byUses[uses]
+            if self.minUses == uses:
+                self.minUses = uses + 1
+        entry[1] = uses + 1
+        self.byUses.setdefault(uses + 1, OrderedDict())[key] = None
+        return entry[0]
+
+    def put(self, key, value):
+        self.entries[key] = [value, 1]
+        self.byUses.setdefault(1, OrderedDict())[key] = None
+        self.minUses = 1
+
+    def evict(self):
+        keys = self.byUses[self.minUses]
+        key = keys.popitem(last=False)[0]
+        if not keys:
+            del self.byUses[self.minUses]
+        del self.entries[key]
+
+
+class TransitionCache():
+    def __init__(self, maxSize=100000, policy='lru', tolerance=None, model=None):
+        if policy not in POLICIES:
+            raise ValueError('cache policy must be one of ' + ', '.join(POLICIES) + ', got ' + repr(policy))
+        if maxSize < 1:
+            raise ValueError('cache size must be at least 1')
+        if tolerance is not None and tolerance <= 0:
+            raise ValueError('cache tolerance must be positive or None for exact keys')
+        self.maxSize = maxSize
+        self.policy = policy
+        self.tolerance = tolerance
+        self.model = model      #entries are only valid for one plant model, don't share a cache between models
+        if model is None:
+            self.stepState = core.stepState
+            self.fuelBurnDivisor = 150
+        else:
+            self.stepState = model.stepState
+            self.fuelBurnDivisor = model.config['fuelBurnDivisor']
+        self.clear()
+
+    def clear(self):
+        self.store = LRUStore() if self.policy == 'lru' else LFUStore()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, rState, rodPosition, pPump, sPump, ePump):
+        if self.tolerance is None:
+            return (rState.rTemp, rState.fuel, rState.damage, rState.dailyOutput, rState.damageControl, rodPosition, pPump, sPump, ePump)
+        tolerance = self.tolerance
+        return (round(rState.rTemp / tolerance), round(rState.fuel / tolerance), rState.damage, round(rState.dailyOutput / tolerance),
+            rState.damageControl, rodPosition, pPump, sPump, ePump)
+
+    def step(self, rState, rodPosition, pPump, sPump, ePump):
+        key = self.key(rState, rodPosition, pPump, sPump, ePump)
+        result = self.store.get(key)
+        if result is None:
+            self.misses += 1
+            fuel = rState.fuel
+            totalOutput = rState.totalOutput
+            events = self.stepState(rState, rodPosition, pPump, sPump, ePump)
+            if len(self.store) >= self.maxSize:
+                self.store.evict()
+                self.evictions += 1
+            rState.fuel = fuel      #cache only what the key decides, the plant's own fuel and totals are applied below like on a hit
+            rState.totalOutput = totalOutput
+            rState.day -= 1
+            self.store.put(key, (rState.rTemp, rState.eTemp, rState.cTemp, rState.damage, rState.dailyOutput, rState.damageControl, tuple(events)))
+        else:
+            self.hits += 1
+            rState.rodPosition = rodPosition
+            rState.pPump = pPump
+            rState.sPump = sPump
+            rState.ePump = ePump
+            rState.rTemp, rState.eTemp, rState.cTemp, rState.damage, rState.dailyOutput, rState.damageControl, events = result
+            events = list(events)
+
+        #same order of operations as the end of stepState
+        rState.totalOutput += rState.dailyOutput
+        rState.fuel -= rState.rodPosition / self.fuelBurnDivisor
+        rState.day += 1
+        return events
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits':self.hits, 'misses':self.misses, 'evictions':self.evictions, 'size':len(self.store),
+            'hitRate':self.hits / lookups if lookups else 0.0}
+
+
+def verify(games=500, gameLength=150, seed=0, maxSize=100000, policy='lru', model=None):
+    #controls come off a coarse grid and are held for a few days so the shared cache gets hits across games,
+    #damage control is toggled now and then so both key values are covered
+    rng = random.Random(seed)
+    cache = TransitionCache(maxSize, policy, model=model)
+    mismatched = 0
+    for game in range(games):
+        plain = core.PWRCore(gameLength, model=model)
+        cached = core.PWRCore(gameLength, cache=cache, model=model)
+        controls = None
+        same = True
+        while same and not plain.isOver() and plain.rState.damage < 100:
+            if controls is None or rng.random() < 0.2:
+                controls = (rng.randrange(0, 101, 10), rng.randrange(0, 101, 25), rng.randrange(0, 101, 25), rng.randrange(0, 101, 50))
+            if rng.random() < 0.05:
+                same = plain.toggleDamageControl() == cached.toggleDamageControl()
+            same = same and plain.step(*controls) == cached.step(*controls) and plain.rState.toBytes() == cached.rState.toBytes()
+        if not same:
+            mismatched += 1
+    return mismatched
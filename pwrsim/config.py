@@ -0,0 +1,251 @@
+"""
+Description: Plant variants for the Python PWR Sim. A plant config names
+the physics constants that core.stepState has hard-coded (turbine
+efficiency, the damage penalty, MWe per degree, the damage thresholds,
+fuel burn, the rtrMap ranges and so on), can be loaded from a JSON or INI
+file, and is compiled once into its own stepState/stepPhysics/stepDamage
+functions with the numbers written into the generated source. A compiled
+step costs the same as the built in one, there are no per step lookups,
+and the DEFAULTS config reproduces core.stepState bit for bit (verify()
+checks it). A TransitionCache holds days of one model only, PWRCore
+raises ValueError when given a cache made for a different model.
+
+Only the day step is configured. The annunciator limits, the 212F
+damage control check in PWRCore.toggleDamageControl, endStats and the
+held controls fast path (PWRCore.advance steps day by day for a
+configured plant) keep the stock values.
+
+Config files:
+    JSON: {"name": "hot running", "turbineEfficiency": 0.8, "mwePerDegree": 1.5}
+    INI:  [plant]
+          name = hot running
+          turbineEfficiency = 0.8
+Keys left out keep their DEFAULTS value, unknown keys are an error.
+
+Usage:
+    model = compileModel(loadConfig('variant.json'))
+    plant = core.PWRCore(150, model=model)
+    core.playGame(150, schedule, model=model)
+    core.playGame(150, schedule, TransitionCache(model=model), model=model)
+    python -m pwrsim.sweep --config variant.json ...
+
+Classes:
+    PlantModel
+        Description: A compiled config, attributes config, name, stepState, stepPhysics, stepDamage
+Functions:
+    loadConfig(path): Reads a JSON or INI config file, returns the full config dict
+    makeConfig(overrides): Returns DEFAULTS with overrides applied, checked
+    compileModel(config): Returns the PlantModel for a config, compiled once per distinct config
+    verify(games, gameLength, seed): Plays random games on the stock plant and the compiled DEFAULTS,
+        returns number of games that differ in any field or event on any day
+"""
+import configparser
+import json
+import random
+
+from pwrsim import core
+
+DEFAULTS = {
+    'turbineEfficiency':0.83,    #turbine efficiency of an undamaged plant
+    'damageEfficiencyDivisor':200,   #efficiency lost is damage / this
+    'voidDivisor':600,   #core heating scales with rTemp / this
+    'rodHeatMin':-100,   #rods 0-100 map onto this heating range
+    'rodHeatMax':100,
+    'fuelHeatMin':-150,  #fuel 0-100 maps onto this heating range
+    'fuelHeatMax':70,
+    'rodsInCooling':2,   #degrees a day the core cools with the rods fully in
+    'flowSplit':50,  #primary plus emergency flow above this is high flow
+    'maxFlow':200,
+    'flowCorrectionMin':5,   #flow correction in degrees, grows with flow above the split and shrinks with it below
+    'flowCorrectionMax':25,
+    'instability':2,     #degrees a running core is kept from perfect balance
+    'instabilityPrimaryFlow':20,     #above this primary or the emergency flow below the balance tips to cooling
+    'instabilityEmergencyFlow':40,
+    'coreAmbient':70,
+    'loopAmbient':80,
+    'secondaryCooling':1.5,  #degrees the exchanger runs below the core per point of secondary flow
+    'boilingPoint':212,  #exchanger temp where the turbines start producing
+    'mwePerDegree':1.4,
+    'reactorDamageTemp':700,
+    'exchangerDamageTemp':450,
+    'condensorDamageTemp':212,
+    'degreesPerDamage':50,
+    'repairRate':2,  #damage repaired a day by damage control
+    'crewSafeTemp':212,  #core temp above which damage control is recalled
+    'fuelBurnDivisor':150,   #fuel burned a day is rodPosition / this
+}
+DIVISORS = ('damageEfficiencyDivisor', 'voidDivisor', 'degreesPerDamage', 'fuelBurnDivisor', 'flowSplit')
+
+TEMPLATE = '''
+def stepPhysics(rState, rodPosition, pPump, sPump, ePump):
+    rState.rodPosition = rodPosition
+    rState.pPump = pPump
+    rState.sPump = sPump
+    rState.ePump = ePump
+
+    turbineEfficiency = {turbineEfficiency} - (rState.damage / {damageEfficiencyDivisor})
+
+    if rState.rodPosition > 0:
+        rTempDelta = (rState.rTemp/{voidDivisor}) * (((rState.rodPosition - 0) * ({rodHeatMax} - {rodHeatMin}) / (100 - 0) + {rodHeatMin}) + ((rState.fuel - 0) * ({fuelHeatMax} - {fuelHeatMin}) / (100 - 0) + {fuelHeatMin}) + rState.damage)
+    elif rState.rTemp > {coreAmbient}:
+        rTempDelta = -{rodsInCooling}
+    else:
+        rTempDelta = 0
+
+    if rTempDelta > 0 or rTempDelta < 0:
+        if (rState.pPump+rState.ePump > {flowSplit}):
+            rTempDelta -= (((rState.pPump+rState.ePump) - {flowSplit}) * ({flowCorrectionMax} - {flowCorrectionMin}) / ({maxFlow} - {flowSplit}) + {flowCorrectionMin})
+        else:
+            rTempDelta += (((rState.pPump+rState.ePump) - 0) * ({flowCorrectionMin} - {flowCorrectionMax}) / ({flowSplit} - 0) + {flowCorrectionMax})
+    elif rTempDelta == 0 and rState.rTemp == {coreAmbient}:
+        pass
+    else:
+        if rState.pPump > {instabilityPrimaryFlow} or rState.ePump > {instabilityEmergencyFlow}:
+            rTempDelta -= {instability}
+        else:
+            rTempDelta += {instability}
+
+    rState.rTemp += rTempDelta
+
+    rState.eTemp = rState.rTemp - (rState.sPump * {secondaryCooling})
+
+    if rState.eTemp >= {boilingPoint}:
+        rState.dailyOutput = rState.eTemp * {mwePerDegree}
+
+    rState.cTemp = rState.eTemp - (rState.eTemp * turbineEfficiency)
+
+    if(rState.rTemp) < {coreAmbient}:
+        rState.rTemp = {coreAmbient}
+    if(rState.eTemp) < {loopAmbient}:
+        rState.eTemp = {loopAmbient}
+    if(rState.cTemp) < {loopAmbient}:
+        rState.cTemp = {loopAmbient}
+
+def stepDamage(rState):
+    events = []
+
+    if(rState.rTemp > {reactorDamageTemp}):
+        rState.damage += int(round((rState.rTemp - {reactorDamageTemp}) / {degreesPerDamage}))
+        rState.damage += 1
+    if(rState.eTemp > {exchangerDamageTemp}):
+        rState.damage += int(round((rState.eTemp - {exchangerDamageTemp}) / {degreesPerDamage}))
+    if(rState.cTemp > {condensorDamageTemp}):
+        rState.damage += int(round((rState.cTemp - {condensorDamageTemp}) / {degreesPerDamage}))
+
+    if(rState.damageControl):
+        if(rState.rTemp < {crewSafeTemp}):
+            if(rState.damage > 0):
+                rState.damage -= {repairRate}
+            if(rState.damage == 0):
+                events.append(REPAIRS_COMPLETE)
+                rState.damageControl = False
+        else:
+            events.append(DAMAGE_CONTROL_RECALLED)
+            rState.damageControl = False
+
+    if(rState.damage >= 100):
+        events.append(PLANT_DESTROYED)
+
+    rState.totalOutput += rState.dailyOutput
+    rState.fuel -= rState.rodPosition / {fuelBurnDivisor}
+    rState.day += 1
+
+    return events
+
+def stepState(rState, rodPosition, pPump, sPump, ePump):
+    stepPhysics(rState, rodPosition, pPump, sPump, ePump)
+    return stepDamage(rState)
+'''
+
+_compiled = {}  #config items -> PlantModel, so each distinct plant is only compiled once per process
+
+
+class PlantModel():
+    def __init__(self, config, namespace):
+        self.config = config
+        self.name = config.get('name', 'custom')
+        self.stepPhysics = namespace['stepPhysics']
+        self.stepDamage = namespace['stepDamage']
+        self.stepState = namespace['stepState']
+
+    def __repr__(self):
+        return 'PlantModel(' + repr(self.name) + ')'
+
+
+def makeConfig(overrides=None):
+    config = dict(DEFAULTS)
+    for key, value in (overrides or {}).items():
+        if key == 'name':
+            config['name'] = str(value)
+            continue
+        if key not in DEFAULTS:
+            raise ValueError('unknown plant config key ' + repr(key))
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value or value in (float('inf'), float('-inf')):
+            raise ValueError('plant config ' + key + ' must be a finite number, got ' + repr(value))
+        config[key] = value
+    for key in DIVISORS:
+        if config[key] == 0:
+            raise ValueError('plant config ' + key + ' can not be 0')
+    if config['maxFlow'] == config['flowSplit']:
+        raise ValueError('plant config maxFlow must differ from flowSplit')
+    return config
+
+def parseNumber(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def loadConfig(path):
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            overrides = json.load(f)
+        if not isinstance(overrides, dict):
+            raise ValueError(path + ' must hold a JSON object of plant constants')
+    else:
+        parser = configparser.ConfigParser()
+        parser.optionxform = str    #keys are camelCase
+        try:
+            if not parser.read(path):
+                raise FileNotFoundError('no plant config file ' + path)
+        except configparser.Error as err:   #no section header, duplicate keys and so on
+            raise ValueError(path + ': ' + str(err))
+        if 'plant' not in parser:
+            raise ValueError(path + ' needs a [plant] section')
+        overrides = {}
+        for key, text in parser['plant'].items():
+            try:
+                overrides[key] = text if key == 'name' else parseNumber(text)
+            except ValueError:
+                raise ValueError('plant config ' + key + ' must be a number, got ' + repr(text))
+    return makeConfig(overrides)
+
+def compileModel(config=None):
+    config = makeConfig(config)
+    key = tuple(sorted((k, (type(v), v)) for k, v in config.items()))   #1 and 1.0 compile to different code
+    model = _compiled.get(key)
+    if model is None:
+        source = TEMPLATE.format(**{k:repr(v) for k, v in config.items() if k != 'name'})
+        namespace = {'REPAIRS_COMPLETE':core.REPAIRS_COMPLETE, 'DAMAGE_CONTROL_RECALLED':core.DAMAGE_CONTROL_RECALLED,
+            'PLANT_DESTROYED':core.PLANT_DESTROYED}
+        exec(compile(source, '<plant config ' + config.get('name', 'custom') + '>', 'exec'), namespace)
+        model = PlantModel(config, namespace)
+        _compiled[key] = model
+    return model
+
+def verify(games=500, gameLength=150, seed=0):
+    rng = random.Random(seed)
+    model = compileModel(DEFAULTS)
+    mismatched = 0
+    for game in range(games):
+        stock = core.PWRCore(gameLength)
+        compiled = core.PWRCore(gameLength, model=model)
+        same = True
+        while same and not stock.isOver() and stock.rState.damage < 100:
+            controls = (rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100))
+            if rng.random() < 0.05:     #damage control changes which branches of stepDamage run
+                same = stock.toggleDamageControl() == compiled.toggleDamageControl()
+            same = same and stock.step(*controls) == compiled.step(*controls) and stock.rState.toBytes() == compiled.rState.toBytes()
+        if not same:
+            mismatched += 1
+    return mismatched
@@ -0,0 +1,361 @@
+"""
+Description: Headless plant model for the Python PWR Sim. Holds the
+plant state and advances it one day at a time without touching Tk, so
+the reactor can be stepped from scripts, batch jobs and tests. Anything
+that used to pop a dialog in the middle of the physics is returned as
+an event string instead and it is up to the caller to show it.
+
+Classes:
+    PWRCore(gameLength, instrument, cache, model)
+        Description: Plant state plus the day stepping, damage control and end of game economics.
+            model is an optional pwrsim.config.PlantModel that replaces the day step for a plant variant,
+            a cache must have been made for the same model or ValueError is raised
+        Methods:
+            addStepHook(hook):
+                Description: Call hook(rState, controls, events) after every day, removeStepHook(hook) undoes it
+            step(rodPosition, pPump, sPump, ePump):
+                Description: Set the control inputs and advance the plant one day
+                Returns: list of event strings raised during the day
+            advance(days, rodPosition, pPump, sPump, ePump):
+                Description: Hold the controls for several days, stops early if the plant is destroyed
+                Returns: list of event strings raised during those days
+            toggleDamageControl():
+                Description: Dispatch or recall damage control teams
+                Returns: one of the damage control event strings
+            isOver():
+                Returns: True once the day counter reaches gameLength
+            endStats():
+                Returns: dict with the endScreen economics
+Functions:
+    newState(gameLength): Returns a fresh PlantState for a new game
+    stepState(rState, rodPosition, pPump, sPump, ePump): Advances rState one day in place, returns events
+    stepPhysics(rState, rodPosition, pPump, sPump, ePump): First part of stepState, sets the controls and temperatures
+    stepDamage(rState): Rest of stepState, damage, damage control and the day totals, returns events
+    endStats(rState): Returns dict of Profit, Losses, DamageCost, TrueLosses, TrueProfit
+    annunciators(rState, powerLimit): Returns a tuple of on/off flags for the annunciator panel lights, in ANNUNCIATORS order.
+        powerLimit is the unit's rated MWe for the OVER POWER LIMIT light, 500 for the stock plant
+    advanceState(rState, days, rodPosition, pPump, sPump, ePump): Same result as calling stepState days times, skipping steady days in closed form
+    playGame(gameLength, schedule, cache, history, model): Plays a whole game headless and returns the finished PWRCore
+"""
+from pwrsim.state import PlantState
+
+#events raised by stepState
+REPAIRS_COMPLETE = 'repairs complete'
+DAMAGE_CONTROL_RECALLED = 'damage control recalled'
+PLANT_DESTROYED = 'plant destroyed'
+
+#annunciator panel lights, top row then bottom row
+ANNUNCIATORS = ('damageControl', 'rTempHigh', 'eTempHigh', 'cTempHigh', 'powerLimit',
+    'generatorsOffline', 'lowPrimaryFlow', 'lowSecondaryFlow', 'emergencyCoolant', 'lowFuel')
+
+#events raised by toggleDamageControl
+DAMAGE_CONTROL_ACTIVATED = 'damage control activated'
+DAMAGE_CONTROL_DEACTIVATED = 'damage control deactivated'
+CORE_TOO_HOT = 'core too hot'
+
+
+def rtrMap(val, inMin, inMax, outMin, outMax):  #math from Arduino C++ map function
+    return ((val - inMin) * (outMax - outMin) / (inMax - inMin) + outMin)
+
+def newState(gameLength=100):
+    return PlantState(gameLength)
+
+def stepState(rState, rodPosition, pPump, sPump, ePump):
+    stepPhysics(rState, rodPosition, pPump, sPump, ePump)
+    return stepDamage(rState)
+
+def stepPhysics(rState, rodPosition, pPump, sPump, ePump):  #first half of a day: controls and temperatures
+    rState.rodPosition = rodPosition
+    rState.pPump = pPump
+    rState.sPump = sPump
+    rState.ePump = ePump
+
+    turbineEfficiency = 0.83 - (rState.damage / 200)
+
+    #term 1 gives the reactor a positive void coefficient, similar to Chernobyl No.4, higher temps decrease reactor stability and accelerate reaction faster
+    #term 2 maps rod position to a value between -100 and 100 for reasonable temperature deltas
+    #term 3 prevents the reactor from creating free energy with no fuel
+    #term 4 increases temperature by 1 for each point of damage
+    #reactor stablizes at 15% rods, 100% fuel, 0% damage, 600F core temp
+    #(t/600) (((r-0) * (100-(0-100)) / (100-0) + (-100)) + ((f-0) * (70-(-150)) / (100-0) + (-150)) + d)
+    #tune terms 2 and 3 for balance/realism
+    if rState.rodPosition > 0:
+        rTempDelta = (rState.rTemp/600) * (rtrMap(rState.rodPosition, 0, 100, -100, 100) + rtrMap(rState.fuel, 0, 100, -150, 70) + rState.damage)
+    elif rState.rTemp > 70:
+        rTempDelta = -2
+    else:
+        rTempDelta = 0
+
+    #this block simulates the effects of coolant flow on reactor core temperature
+    if rTempDelta > 0:  #if the reactor is heating, slow heating below 50% core flow, else speed it up
+        if (rState.pPump+rState.ePump > 50):    #high flow
+            rTempDelta -= rtrMap((rState.pPump+rState.ePump), 50, 200, 5, 25)
+        else:   #low flow
+            rTempDelta += rtrMap((rState.pPump+rState.ePump), 0, 50, 25, 5)
+    elif rTempDelta < 0:    #if the reactor is cooling, slow cooling below 50% core flow, else speed it up
+        if (rState.pPump+rState.ePump > 50):    #high flow
+            rTempDelta -= rtrMap((rState.pPump+rState.ePump), 50, 200, 5, 25)
+        else:   #low flow
+            rTempDelta += rtrMap((rState.pPump+rState.ePump), 0, 50, 25, 5)
+    elif rTempDelta == 0 and rState.rTemp == 70:   #let the reactor be stable when off       ####THESE NEED EDITED AS THEY ALLOW FREE ENERGY GENERATION
+        pass #this is a no-op to satisfy interpreter
+    else:   #if the reactor is running do not let reach perfect stability
+        if rState.pPump > 20 or rState.ePump > 40:
+            rTempDelta -= 2
+        else:
+            rTempDelta += 2
+
+    rState.rTemp += rTempDelta   #set new reactor core temperature
+
+    #heat exchanger temp based on reactor core temp and primary and secondary coolant flow
+    #((rState['rTemp'] * 1/rState['pCoolant']) takes energy into the exchanger based on core temp and secondary coolant flow
+    rState.eTemp = rState.rTemp - (rState.sPump * 1.5)
+
+    if rState.eTemp >= 212:  #if the exchanger is above boiling point
+        #every degree of temperature generates 1.4MWe
+        rState.dailyOutput = rState.eTemp * 1.4
+
+    #condensor temp based on energy drop from turbines
+    rState.cTemp = rState.eTemp - (rState.eTemp * turbineEfficiency)
+
+    #ensure temperatures don't drop below ambient
+    if(rState.rTemp) < 70:
+        rState.rTemp = 70
+    if(rState.eTemp) < 80:
+        rState.eTemp = 80
+    if(rState.cTemp) < 80:
+        rState.cTemp = 80
+
+def stepDamage(rState):     #second half of a day: damage, repairs and the output, fuel and day totals, returns events
+    events = []
+
+    #Damage logic block
+    if(rState.rTemp > 700):  #If reactor over 700F add 1 point of damage for each 50 degrees
+        rState.damage += int(round((rState.rTemp - 700) / 50))
+        rState.damage += 1
+    if(rState.eTemp > 450):  #If exchangers over 450F add add 1 point of damage for each 50 degrees
+        rState.damage += int(round((rState.eTemp - 450) / 50))
+    if(rState.cTemp > 212):  #If condensor over 200F add add 1 point of damage for each 50 degrees
+        rState.damage += int(round((rState.cTemp - 212) / 50))
+
+    if(rState.damageControl):
+        if(rState.rTemp < 212):
+            if(rState.damage > 0):
+                rState.damage -= 2
+            if(rState.damage == 0):
+                events.append(REPAIRS_COMPLETE)
+                rState.damageControl = False
+        else:
+            events.append(DAMAGE_CONTROL_RECALLED)
+            rState.damageControl = False
+
+    if(rState.damage >= 100):   #If plant damage reaches or exceeds 100 the game is over
+        events.append(PLANT_DESTROYED)
+
+    #update plant output, fuel totals, and increment day counter
+    rState.totalOutput += rState.dailyOutput
+    rState.fuel -= rState.rodPosition / 150
+    rState.day += 1
+
+    return events
+
+def repeatedSum(start, inc, n):
+    #start with inc added n times, None if the float result can't be had without doing the additions.
+    #Every partial sum is a multiple of the finer of the two float grids and lies between the end points,
+    #so when both end points fit in 53 bits on that grid each addition is exact and one multiply gives the same bits
+    if isinstance(start, int) and isinstance(inc, int):
+        return start + n * inc
+    from fractions import Fraction  #imported here, it pulls in decimal and re and is most of the package's import time
+    start = Fraction(start)
+    inc = Fraction(inc)
+    end = start + n * inc
+    grid = max(start.denominator, inc.denominator)
+    if max(abs(start), abs(end)) * grid >= 2**53:
+        return None
+    return float(end)
+
+def steadyDays(rState, rodPosition, pPump, sPump, ePump, maxDays):
+    #Skip up to maxDays days with the rods fully inserted, when the core only warms or cools by a constant amount
+    #each day. Only used while nothing else can change: damage control off, exchanger below 212F the whole time
+    #(so dailyOutput is constant and no component can take damage) and the core stays off the 70F floor.
+    #Returns the number of days skipped, 0 when the plant is not in that regime.
+    if maxDays <= 0 or rodPosition != 0 or rState.damageControl or rState.damage >= 100:
+        return 0
+    rTemp = rState.rTemp
+    if rTemp == 70:     #reactor off and cold, core temp does not move
+        rTempDelta = 0
+    elif rTemp > 70:    #same cooling correction stepState applies with the rods in
+        rTempDelta = -2
+        if (pPump+ePump > 50):
+            rTempDelta -= rtrMap((pPump+ePump), 50, 200, 5, 25)
+        else:
+            rTempDelta += rtrMap((pPump+ePump), 0, 50, 25, 5)
+    else:
+        return 0
+
+    def coreTemp(days):     #core temp after that many skipped days, None if not exact or it would leave the regime
+        if rTempDelta == 0:
+            temp = rTemp
+        else:
+            temp = repeatedSum(rTemp, rTempDelta, days)
+            if temp is None or temp < 70:
+                return None
+        if (temp - (sPump * 1.5)) >= 212 or ((rTemp + rTempDelta) - (sPump * 1.5)) >= 212:  #first and last skipped day
+            return None
+        return temp
+
+    low = 0     #binary search the longest skip, every condition gets worse monotonically with more days
+    high = maxDays
+    while low < high:
+        mid = (low + high + 1) // 2
+        if coreTemp(mid) is None:
+            high = mid - 1
+        else:
+            low = mid
+    if low == 0:
+        return 0
+
+    totalOutput = repeatedSum(rState.totalOutput, rState.dailyOutput, low)
+    if totalOutput is None:     #output total is not exact in closed form, plain additions are still cheap
+        totalOutput = rState.totalOutput
+        for day in range(low):
+            totalOutput += rState.dailyOutput
+    rState.rTemp = coreTemp(low)
+    rState.totalOutput = totalOutput
+    rState.day += low
+    return low
+
+def advanceState(rState, days, rodPosition, pPump, sPump, ePump):
+    #days of constant controls, the last day is always a full stepState so eTemp, cTemp and the controls are current.
+    #Stops early if the plant is destroyed.
+    events = []
+    while days > 0:
+        days -= steadyDays(rState, rodPosition, pPump, sPump, ePump, days - 1)
+        dayEvents = stepState(rState, rodPosition, pPump, sPump, ePump)
+        events.extend(dayEvents)
+        days -= 1
+        if PLANT_DESTROYED in dayEvents:
+            break
+    return events
+
+def endStats(rState):
+    #profit/losses metric based on power generated and ending damage
+    Profit = rState.totalOutput * 1000 * 0.14
+    Losses = (100 - rState.fuel) * 1000
+    if(rState.damage < 100):
+        DamageCost = rState.damage * 1000
+    else:
+        DamageCost = 2000000000
+    TrueLosses = (Losses + DamageCost)
+    TrueProfit = (Profit - TrueLosses)
+
+    return {'Profit':Profit, 'Losses':Losses, 'DamageCost':DamageCost, 'TrueLosses':TrueLosses, 'TrueProfit':TrueProfit}
+
+def annunciators(rState, powerLimit=500.0):
+    return (rState.damageControl == True,   #damage control indicator
+        rState.rTemp > 700,     #reactor overtemp indicator
+        rState.eTemp > 450,     #exchanger overtemp indicator
+        rState.cTemp > 212,     #condensor overtemp indicator
+        rState.dailyOutput >= powerLimit,   #plant power limit indicator
+        rState.eTemp < 212.0,   #secondary loop low temp/generator inactive indicator
+        rState.pPump <= 10,     #primary loop low pressure indicator
+        rState.sPump <= 10,     #secondary loop low pressure indicator
+        rState.ePump > 0,       #emergency coolant valve indicator
+        rState.fuel <= 15.0)    #fuel low indicator
+
+def playGame(gameLength, schedule, cache=None, history=None, model=None):
+    #schedule is one (rodPosition, pPump, sPump, ePump) tuple held for the whole game,
+    #or a list of them indexed by turn where the last entry is held if the list runs out.
+    #history is an optional pwrsim.history.PlantHistory to record every day into,
+    #model an optional pwrsim.config.PlantModel to play a plant variant instead of the stock plant, cache has to be for that model
+    plant = PWRCore(gameLength, cache=cache, model=model)
+    if history is not None:
+        history.attach(plant)
+    perDay = isinstance(schedule[0], (tuple, list))
+    if not perDay:  #constant controls can use the steady state fast path
+        plant.advance(gameLength - plant.rState.day, *schedule)
+        return plant
+    turn = 0
+    while not plant.isOver():   #same end conditions as the gui, out of days or plant destroyed
+        controls = schedule[min(turn, len(schedule) - 1)]
+        if PLANT_DESTROYED in plant.step(*controls):
+            break
+        turn += 1
+    return plant
+
+
+class PWRCore():
+    def __init__(self, gameLength=100, instrument=None, cache=None, model=None):
+        self.rState = newState(gameLength)
+        self.instrument = instrument    #optional pwrsim.instrument.Instrument, times the physics and damage phases, or the cache phase
+        self.cache = cache      #optional pwrsim.cache.TransitionCache, can be shared between plants of the same model
+        self.model = model      #optional pwrsim.config.PlantModel, None is the stock plant
+        if cache is not None and cache.model is not model:  #cached days of one plant are wrong for any other
+            raise ValueError('transition cache is for ' + repr(cache.model or 'the stock plant') + ', not ' + repr(model or 'the stock plant'))
+        if model is None:
+            self.stepFunctions = (stepState, stepPhysics, stepDamage)
+        else:
+            self.stepFunctions = (model.stepState, model.stepPhysics, model.stepDamage)
+        self.stepHooks = []
+
+    def addStepHook(self, hook):    #hook(rState, controls, events) is called after every day
+        self.stepHooks.append(hook)
+
+    def removeStepHook(self, hook):
+        self.stepHooks.remove(hook)
+
+    def step(self, rodPosition, pPump, sPump, ePump):   #advance the plant one day, returns list of events
+        if self.instrument is None:
+            if self.cache is None:
+                events = self.stepFunctions[0](self.rState, rodPosition, pPump, sPump, ePump)
+            else:
+                events = self.cache.step(self.rState, rodPosition, pPump, sPump, ePump)
+        elif self.cache is not None:    #a cached day can't be split into phases, it is timed whole and counted as a hit or a miss
+            clock = self.instrument.clock
+            hits = self.cache.hits
+            start = clock()
+            events = self.cache.step(self.rState, rodPosition, pPump, sPump, ePump)
+            self.instrument.record('cache', start, clock())
+            self.instrument.count('cache hit' if self.cache.hits > hits else 'cache miss')
+            for event in events:
+                self.instrument.count(event)
+        else:
+            step, physics, damage = self.stepFunctions
+            clock = self.instrument.clock
+            start = clock()
+            physics(self.rState, rodPosition, pPump, sPump, ePump)
+            middle = clock()
+            events = damage(self.rState)
+            self.instrument.record('physics', start, middle)
+            self.instrument.record('damage', middle, clock())
+            for event in events:
+                self.instrument.count(event)
+        for hook in self.stepHooks:
+            hook(self.rState, (rodPosition, pPump, sPump, ePump), events)
+        return events
+
+    def advance(self, days, rodPosition, pPump, sPump, ePump):   #hold the controls for several days, returns list of events
+        if self.instrument is None and self.cache is None and self.model is None and not self.stepHooks:     #the closed form skip only knows the stock constants
+            return advanceState(self.rState, days, rodPosition, pPump, sPump, ePump)
+        events = []     #somebody is watching every day, so no skipping ahead
+        for day in range(days):
+            dayEvents = self.step(rodPosition, pPump, sPump, ePump)
+            events.extend(dayEvents)
+            if PLANT_DESTROYED in dayEvents:
+                break
+        return events
+
+    def isOver(self):   #True when the day counter is up
+        return int(self.rState.day) >= int(self.rState.gameLength)
+
+    def toggleDamageControl(self):
+        if(self.rState.damageControl == True):
+            self.rState.damageControl = False
+            return DAMAGE_CONTROL_DEACTIVATED
+        if(self.rState.rTemp < 212.0):   #crews can only go in below boiling
+            self.rState.damageControl = True
+            return DAMAGE_CONTROL_ACTIVATED
+        return CORE_TOO_HOT
+
+    def endStats(self):
+        return endStats(self.rState)
@@ -0,0 +1,218 @@
+"""
+Description: Reinforcement learning environments for the Python PWR Sim,
+following the Gym reset()/step() conventions without depending on gym.
+
+Observation: the plant state fields in OBSERVATION order.
+Action: (rodPosition, pPump, sPump, ePump, scram, damageControl). The four
+    controls are clipped to 0-100, scram ends the game like the SCRAM
+    button, damageControl is the wanted on/off state of the repair crews
+    and is toggled through the same rules as the Damage Control button.
+Reward: the day's change in endScreen TrueProfit (output earnings minus
+    fuel and damage costs), so the rewards of an episode add up to the
+    TrueProfit the game would show at the end.
+terminated is True when the plant is destroyed or SCRAMed, truncated when
+the days run out.
+
+VecPWREnv steps N environments in one call on the numpy batch engine and
+resets finished ones automatically, so there is no per environment Python
+work in a step. SubprocVecEnv splits the environments across worker
+processes, each running a VecPWREnv shard, and talks to them over pipes.
+
+Usage:
+    env = PWREnv(100)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step((15, 100, 100, 0, False, False))
+
+    envs = VecPWREnv(4096, 150)
+    obs, info = envs.reset()
+    obs, rewards, terminated, truncated, info = envs.step(actions)     #actions is an (N, 6) array
+
+Classes:
+    PWREnv(gameLength)
+        Description: One plant, pure Python
+    VecPWREnv(n, gameLength)
+        Description: N plants on pwrsim.batch, needs numpy. Observations are an (N, len(OBSERVATION)) float array
+    SubprocVecEnv(n, gameLength, workers)
+        Description: Same interface as VecPWREnv with the plants spread over worker processes
+        Methods:
+            close(): Stops the workers
+"""
+import multiprocessing
+
+try:
+    import numpy as np
+    from pwrsim import batch
+except ImportError:     #only the vectorized envs need numpy
+    np = None
+
+from pwrsim import core
+from pwrsim.state import FIELDS
+
+OBSERVATION = FIELDS
+ACTION = ('rodPosition', 'pPump', 'sPump', 'ePump', 'scram', 'damageControl')
+
+
+def clip(value):
+    return min(100, max(0, int(value)))
+
+def trueProfit(rState):
+    return core.endStats(rState)['TrueProfit']
+
+
+class PWREnv():
+    def __init__(self, gameLength=100):
+        self.gameLength = gameLength
+        self.plant = None
+        self.done = True
+
+    def reset(self, seed=None):     #the plant has no randomness, seed is accepted for the Gym signature
+        self.plant = core.PWRCore(self.gameLength)
+        self.profit = trueProfit(self.plant.rState)
+        self.done = False
+        return self.plant.rState.astuple(), {}
+
+    def step(self, action):
+        if self.done:
+            raise RuntimeError('episode is over, call reset()')
+        rodPosition, pPump, sPump, ePump, scram, damageControl = action
+        rState = self.plant.rState
+        events = []
+        if bool(damageControl) != rState.damageControl:
+            events.append(self.plant.toggleDamageControl())
+        if scram:
+            rState.scram = True
+        else:
+            events.extend(self.plant.step(clip(rodPosition), clip(pPump), clip(sPump), clip(ePump)))
+
+        profit = trueProfit(rState)
+        reward = profit - self.profit
+        self.profit = profit
+        terminated = rState.scram or rState.damage >= 100
+        truncated = not terminated and self.plant.isOver()
+        self.done = terminated or truncated
+        return rState.astuple(), reward, terminated, truncated, {'events':events}
+
+
+class VecPWREnv():
+    def __init__(self, n, gameLength=100):
+        if np is None:
+            raise ImportError('VecPWREnv needs numpy')
+        self.n = n
+        self.gameLength = gameLength
+        self.engine = batch.BatchPWR(n, gameLength)
+        self.profit = self.trueProfit()
+
+    def __len__(self):
+        return self.n
+
+    def observe(self):
+        plants = self.engine.plants
+        obs = np.empty((self.n, len(OBSERVATION)))
+        for column, field in enumerate(OBSERVATION):
+            obs[:, column] = plants[field]
+        return obs
+
+    def trueProfit(self):   #endStats TrueProfit for every plant
+        return batch.endStats(self.engine.plants)['TrueProfit']
+
+    def reset(self, seed=None):
+        self.engine.reset()
+        self.profit = self.trueProfit()
+        return self.observe(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        plants = self.engine.plants
+        controls = np.clip(actions[:, :4], 0, 100).astype(np.int64)
+        scram = actions[:, 4].astype(bool)
+        toggle = actions[:, 5].astype(bool) != plants['damageControl']
+        events = self.engine.toggleDamageControl(toggle)
+        plants['scram'] |= scram
+        events.update(self.engine.step(*controls.T))
+
+        profit = self.trueProfit()
+        rewards = profit - self.profit
+        terminated = plants['scram'] | (plants['damage'] >= 100)
+        truncated = ~terminated & (plants['day'] >= plants['gameLength'])
+        done = terminated | truncated
+        info = {'events':events}
+        if done.any():  #start the finished games over, the last observation goes in info like Gym vector envs do
+            info['finalObservation'] = self.observe()[done]
+            self.engine.reset(done)
+            profit[done] = self.trueProfit()[done]
+        self.profit = profit
+        return self.observe(), rewards, terminated, truncated, info
+
+    def close(self):
+        pass
+
+
+def worker(connection, n, gameLength):  #runs one VecPWREnv shard for SubprocVecEnv
+    envs = VecPWREnv(n, gameLength)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                connection.send(envs.step(data))
+            elif command == 'reset':
+                connection.send(envs.reset(data))
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class SubprocVecEnv():
+    def __init__(self, n, gameLength=100, workers=None):
+        if np is None:
+            raise ImportError('SubprocVecEnv needs numpy')
+        workers = min(n, workers or multiprocessing.cpu_count())
+        self.n = n
+        self.sizes = [n // workers + (1 if i < n % workers else 0) for i in range(workers)]
+        self.offsets = [sum(self.sizes[:i]) for i in range(workers)]
+        self.connections = []
+        self.processes = []
+        for size in self.sizes:
+            parentEnd, childEnd = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=worker, args=(childEnd, size, gameLength), daemon=True)
+            process.start()
+            childEnd.close()
+            self.connections.append(parentEnd)
+            self.processes.append(process)
+
+    def __len__(self):
+        return self.n
+
+    def gather(self, replies):  #stitch the shard replies back into one batch, shards are in env order
+        obs = np.concatenate([reply[0] for reply in replies])
+        if len(replies[0]) == 2:    #reset
+            return obs, {}
+        rewards, terminated, truncated = (np.concatenate([reply[i] for reply in replies]) for i in (1, 2, 3))
+        info = {'events':{name:np.concatenate([reply[4]['events'][name] for reply in replies]) for name in replies[0][4]['events']}}
+        finals = [reply[4]['finalObservation'] for reply in replies if 'finalObservation' in reply[4]]
+        if finals:
+            info['finalObservation'] = np.concatenate(finals)
+        return obs, rewards, terminated, truncated, info
+
+    def reset(self, seed=None):
+        for connection in self.connections:
+            connection.send(('reset', seed))
+        return self.gather([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for connection, offset, size in zip(self.connections, self.offsets, self.sizes):
+            connection.send(('step', actions[offset:offset + size]))
+        return self.gather([connection.recv() for connection in self.connections])
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
@@ -0,0 +1,343 @@
+"""
+Description: Fleet simulation for the Python PWR Sim. Many reactor units
+feed one grid that asks for a given number of MWe each day. Every day the
+demand is dispatched across the units that are still running, each unit's
+controller turns its share into rod and secondary pump settings, and all
+units are stepped together on the numpy batch engine (pwrsim.batch), so
+each unit follows exactly the stock plant physics.
+
+Dispatch: the demand is water filled over the running units. Every unit
+gets the same share unless that is more than its capacity (its
+powerLimit, or the 630 MWe the controller makes at the exchanger damage
+limit if that is lower), in which case it runs at capacity and the rest
+is spread over the units with room left. Only demand past the capacity of
+every running unit is shortfall. Units that are still warming up get
+their share too so they heat towards it.
+Unit controller: the primary pump runs at 100% and the emergency pump is
+off. The wanted exchanger temp is share / 1.4 MWe per degree (kept between
+boiling and the 450F exchanger damage limit), the core is held 75F above
+it so the secondary pump sits in the middle of its range, the rods are set
+from the core heat balance to close a quarter of the core temp error a
+day and the secondary pump takes the exchanger down to the wanted temp.
+Units with no share scram their rods to 0. A boiling unit never makes
+less than 212 * 1.4 = 297 MWe, so a share below that is over delivered.
+
+Annunciator lights are kept per unit as a uint16 bitfield, bit i is
+core.ANNUNCIATORS[i], with each unit's own powerLimit for OVER POWER LIMIT.
+
+ShardedFleet splits the units over worker processes, each running a Fleet
+shard. The parent keeps the capacities of every shard's running units,
+finds the water level for the whole fleet and sends each shard the demand
+its units take at that level, so the shards end up with the same shares
+as one big Fleet. That is one message per shard per day, plus asking a
+shard for its capacities again on the days some of its units stop.
+
+Requires numpy.
+
+Usage:
+    fleet = Fleet(5000, 150, powerLimit=500.0)
+    reports = fleet.run(demandCurve(150, 5000 * 300.0, 5000 * 80.0))
+    fleet.economics()['TrueProfit']
+
+    python -m pwrsim.fleet --units 5000 --days 150 --workers 4
+
+Classes:
+    Fleet(units, gameLength, powerLimit)
+        Description: N units on one grid, stepped together in this process
+        Methods:
+            step(demand): Dispatches one day's demand in MWe and steps every unit, returns the day's report dict
+                of day, demand, delivered, shortfall, online (units that played the day), running (still playing
+                after it), destroyed and events (event string -> number of units)
+            run(demands): Steps a day per demand until the list or the running units run out, returns the reports
+            capacities(): Returns the MWe each running unit can be dispatched, in unit order
+            annunciatorBits(): Returns the uint16 annunciator bitfield of every unit
+            unitStats(): Returns dict of endStats field -> array with one value per unit
+            economics(): Returns the endStats fields summed over the fleet plus the demand totals
+    ShardedFleet(units, gameLength, powerLimit, workers)
+        Description: Same methods as Fleet with the units spread over worker processes
+        Methods:
+            close(): Stops the workers
+Functions:
+    demandCurve(days, base, swing, period): Returns a list of daily demands swinging around base
+    waterLevel(capacities, demand): Returns the share that fills demand when each unit takes the share or its capacity
+        if that is lower, inf if the demand is more than all of them
+    annunciatorBits(plants, powerLimit): Returns the uint16 bitfield for an array of plant records
+    unpackAnnunciators(bits): Returns dict of annunciator name -> bool mask
+"""
+import argparse
+import math
+import multiprocessing
+import time
+
+import numpy as np
+
+from pwrsim import batch, core
+
+PRIMARY_PUMP = 100
+CORE_MARGIN = 75.0      #core runs this far above the wanted exchanger temp, half the secondary pump's 150F range
+CORE_RESPONSE = 0.25    #fraction of the core temp error the rods try to close each day
+MIN_EXCHANGER = 212.0   #boiling, below this a unit makes nothing
+MAX_EXCHANGER = 450.0   #exchanger damage starts above this
+MAX_OUTPUT = MAX_EXCHANGER * 1.4    #most MWe the unit controller asks of a unit
+FLOW_CORRECTION = batch.rtrMap(PRIMARY_PUMP, 50, 200, 5, 25)    #high flow correction stepState applies every day at PRIMARY_PUMP
+
+REPORT_TOTALS = ('demand', 'delivered', 'shortfall', 'online', 'running', 'destroyed')     #report fields that add up across shards
+STATS = ('Profit', 'Losses', 'DamageCost', 'TrueLosses', 'TrueProfit')
+
+
+def demandCurve(days, base, swing=0.0, period=7):   #weekly swing by default
+    return [base + swing * math.sin(2 * math.pi * day / period) for day in range(days)]
+
+def waterLevel(capacities, demand):
+    capacities = np.sort(capacities)
+    n = len(capacities)
+    if n == 0 or demand <= 0:
+        return 0.0
+    below = np.concatenate(([0.0], np.cumsum(capacities)[:-1]))    #capacity of the units smaller than each one
+    filled = below + capacities * np.arange(n, 0, -1)    #MWe taken with the level at each unit's capacity
+    capped = int(np.searchsorted(filled, demand))   #units that run at capacity
+    if capped == n:
+        return math.inf
+    return (demand - below[capped]) / (n - capped)
+
+def annunciatorBits(plants, powerLimit=500.0):  #vectorized core.annunciators, one bit per light
+    lights = (plants['damageControl'],
+        plants['rTemp'] > 700,
+        plants['eTemp'] > 450,
+        plants['cTemp'] > 212,
+        plants['dailyOutput'] >= powerLimit,
+        plants['eTemp'] < 212.0,
+        plants['pPump'] <= 10,
+        plants['sPump'] <= 10,
+        plants['ePump'] > 0,
+        plants['fuel'] <= 15.0)
+    bits = np.zeros(len(plants), np.uint16)
+    for bit, on in enumerate(lights):
+        bits |= on.astype(np.uint16) << np.uint16(bit)
+    return bits
+
+def unpackAnnunciators(bits):
+    return {name:(bits >> np.uint16(bit)) & 1 == 1 for bit, name in enumerate(core.ANNUNCIATORS)}
+
+
+class Fleet():
+    def __init__(self, units, gameLength=100, powerLimit=500.0):
+        self.engine = batch.BatchPWR(units, gameLength)
+        self.powerLimit = np.broadcast_to(np.asarray(powerLimit, dtype=float), (units,)).copy()
+        self.capacity = np.minimum(self.powerLimit, MAX_OUTPUT)
+        self.day = 0
+        self.demandTotal = 0.0
+        self.deliveredTotal = 0.0
+        self.bits = annunciatorBits(self.engine.plants, self.powerLimit)
+
+    def __len__(self):
+        return len(self.engine)
+
+    def online(self):
+        return int(self.engine.active().sum())
+
+    def capacities(self):   #capacity of every running unit
+        return self.capacity[self.engine.active()]
+
+    def dispatch(self, demand, active):     #MWe wanted from every unit, water filled up to each unit's capacity
+        level = waterLevel(self.capacity[active], demand)
+        return np.where(active, np.minimum(self.capacity, level), 0.0)
+
+    def controls(self, shares):     #per unit controller, share in MWe -> rod and secondary pump settings
+        plants = self.engine.plants
+        rTemp = plants['rTemp']
+        wanted = np.clip(shares / 1.4, MIN_EXCHANGER, MAX_EXCHANGER)
+        heating = CORE_RESPONSE * (wanted + CORE_MARGIN - rTemp) + FLOW_CORRECTION
+        rodTerm = heating * 600 / rTemp - batch.rtrMap(plants['fuel'], 0, 100, -150, 70) - plants['damage']
+        rod = np.clip(np.rint((rodTerm + 100) / 2), 0, 100)
+        rod[shares <= 0] = 0
+        #core temp the day will end on, to set the secondary pump against
+        nextTemp = rTemp + (rTemp/600) * (batch.rtrMap(rod, 0, 100, -100, 100) + batch.rtrMap(plants['fuel'], 0, 100, -150, 70) + plants['damage']) - FLOW_CORRECTION
+        sPump = np.clip(np.rint((nextTemp - wanted) / 1.5), 0, 100)
+        sPump[shares <= 0] = 100
+        return rod.astype(np.int64), PRIMARY_PUMP, sPump.astype(np.int64), 0
+
+    def step(self, demand):
+        plants = self.engine.plants
+        active = self.engine.active()
+        shares = self.dispatch(demand, active)
+        before = plants['totalOutput'].sum()
+        with np.errstate(all='ignore'):     #cold units divide by their 70F core like any other, finished ones are masked out
+            controls = self.controls(shares)
+        events = self.engine.step(*controls)
+        delivered = float(plants['totalOutput'].sum() - before)
+        self.bits = annunciatorBits(plants, self.powerLimit)
+        self.day += 1
+        self.demandTotal += demand
+        self.deliveredTotal += delivered
+        return {'day':self.day, 'demand':demand, 'delivered':delivered, 'shortfall':max(0.0, demand - delivered),
+            'online':int(active.sum()), 'running':self.online(), 'destroyed':int(events[core.PLANT_DESTROYED].sum()),
+            'events':{name:int(mask.sum()) for name, mask in events.items()}}
+
+    def run(self, demands):
+        reports = []
+        for demand in demands:
+            if not self.online():
+                break
+            reports.append(self.step(demand))
+        return reports
+
+    def annunciatorBits(self):
+        return self.bits
+
+    def unitStats(self):    #core.endStats for every unit
+        return batch.endStats(self.engine.plants)
+
+    def economics(self):
+        result = {name:float(values.sum()) for name, values in self.unitStats().items()}
+        result['demand'] = self.demandTotal
+        result['delivered'] = self.deliveredTotal
+        result['units'] = len(self)
+        result['destroyed'] = int((self.engine.plants['damage'] >= 100).sum())
+        return result
+
+
+def worker(connection, units, gameLength, powerLimit):     #runs one Fleet shard for ShardedFleet
+    fleet = Fleet(units, gameLength, powerLimit)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                connection.send(fleet.step(data))
+            elif command == 'capacities':
+                connection.send(fleet.capacities())
+            elif command == 'annunciators':
+                connection.send(fleet.annunciatorBits())
+            elif command == 'unitStats':
+                connection.send(fleet.unitStats())
+            elif command == 'economics':
+                connection.send(fleet.economics())
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class ShardedFleet():
+    def __init__(self, units, gameLength=100, powerLimit=500.0, workers=None):
+        workers = min(units, workers or multiprocessing.cpu_count())
+        powerLimit = np.broadcast_to(np.asarray(powerLimit, dtype=float), (units,))
+        self.units = units
+        self.sizes = [units // workers + (1 if i < units % workers else 0) for i in range(workers)]
+        self.running = list(self.sizes)     #units still running in each shard after the last day
+        self.shardCapacities = []   #capacity of each shard's running units
+        self.day = 0
+        self.connections = []
+        self.processes = []
+        offset = 0
+        for size in self.sizes:
+            parentEnd, childEnd = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=worker, args=(childEnd, size, gameLength, powerLimit[offset:offset + size].copy()), daemon=True)
+            process.start()
+            childEnd.close()
+            self.connections.append(parentEnd)
+            self.processes.append(process)
+            self.shardCapacities.append(np.minimum(powerLimit[offset:offset + size], MAX_OUTPUT))
+            offset += size
+
+    def __len__(self):
+        return self.units
+
+    def online(self):
+        return sum(self.running)
+
+    def capacities(self):
+        return np.concatenate(self.shardCapacities)
+
+    def ask(self, command, data=None):
+        for connection in self.connections:
+            connection.send((command, data))
+        return [connection.recv() for connection in self.connections]
+
+    def step(self, demand):
+        level = waterLevel(self.capacities(), demand)
+        for connection, capacities in zip(self.connections, self.shardCapacities):
+            connection.send(('step', float(np.minimum(capacities, level).sum())))
+        replies = [connection.recv() for connection in self.connections]
+        self.day += 1
+        report = {'day':self.day}
+        for field in REPORT_TOTALS:
+            report[field] = sum(reply[field] for reply in replies)
+        report['demand'] = demand
+        report['shortfall'] = max(0.0, demand - report['delivered'])
+        report['events'] = {name:sum(reply['events'][name] for reply in replies) for name in replies[0]['events']}
+        changed = [i for i, reply in enumerate(replies) if reply['running'] != self.running[i]]
+        for i in changed:   #units only ever stop, so a shard's running set changed exactly when its count did
+            self.connections[i].send(('capacities', None))
+        for i in changed:
+            self.shardCapacities[i] = self.connections[i].recv()
+        self.running = [reply['running'] for reply in replies]
+        return report
+
+    def run(self, demands):
+        reports = []
+        for demand in demands:
+            if not self.online():
+                break
+            reports.append(self.step(demand))
+        return reports
+
+    def annunciatorBits(self):
+        return np.concatenate(self.ask('annunciators'))
+
+    def unitStats(self):
+        replies = self.ask('unitStats')
+        return {name:np.concatenate([reply[name] for reply in replies]) for name in STATS}
+
+    def economics(self):
+        replies = self.ask('economics')
+        return {name:sum(reply[name] for reply in replies) for name in replies[0]}
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a fleet of PWR units against a daily grid demand curve.')
+    parser.add_argument('--units', type=int, default=1000, help='number of reactor units')
+    parser.add_argument('--days', type=int, default=150, help='game length in days')
+    parser.add_argument('--demand', type=float, default=300.0, help='average demand per unit in MWe')
+    parser.add_argument('--swing', type=float, default=80.0, help='weekly demand swing per unit in MWe')
+    parser.add_argument('--limit', type=float, default=500.0, help='rated output of a unit in MWe, the OVER POWER LIMIT light')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes, 0 steps the whole fleet in this process')
+    args = parser.parse_args(argv)
+
+    demands = demandCurve(args.days, args.units * args.demand, args.units * args.swing)
+    if args.workers:
+        fleet = ShardedFleet(args.units, args.days, args.limit, args.workers)
+    else:
+        fleet = Fleet(args.units, args.days, args.limit)
+    try:
+        start = time.perf_counter()
+        reports = fleet.run(demands)
+        elapsed = time.perf_counter() - start
+        stats = fleet.economics()
+        lights = unpackAnnunciators(fleet.annunciatorBits())
+    finally:
+        if args.workers:
+            fleet.close()
+
+    print(len(reports), 'days of', args.units, 'units in', format(elapsed, '.3f'), 's,', format(elapsed / max(1, len(reports)) * 1000, '.2f'), 'ms a day')
+    print('demand', format(stats['demand'], ',.0f'), 'MWe, delivered', format(stats['delivered'], ',.0f'), 'MWe,',
+        sum(report['shortfall'] > 0 for report in reports), 'days short,', stats['destroyed'], 'units destroyed')
+    print('fleet True Profit = $' + format(stats['TrueProfit']/1000000, ',.2f') + 'Mil')
+    print('lights on at the end:', ', '.join(name + ' ' + str(int(on.sum())) for name, on in lights.items() if on.any()) or 'none')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+"""
+Description: Snapshots and forks for what-if branching in the Python PWR
+Sim. A Snapshot is one immutable node holding the plant state as a tuple
+of field values, the node it came from and the controls and events of the
+day that led to it. A Branch is a playable cursor on a chain of nodes.
+Forking a branch makes a new cursor on the same node, so a fork costs the
+same however long the history behind it is, and branches share every node
+up to the day they diverge. A branch only builds its own plant from the
+node's values (copy on write) the first time it changes anything, and
+every day it plays puts one new node on top of its own chain, so the live
+game and the branches forked from it never see each other's days.
+
+explore() plays a list of what-if control settings from one snapshot and
+returns the projected outcome of each, in this thread or spread over a
+thread or process pool. Pool tasks carry only the state tuple, the rest
+of the chain stays behind.
+
+Usage:
+    root = Snapshot.of(plant.rState)
+    pullRods = Branch(root).fork()
+    pullRods.advance(10, 40, 100, 100, 0)
+    pullRods.history()      #states from root to now
+    results = explore(root, [(rod, 100, 100, 0) for rod in range(0, 101, 5)], 10, workers=4)
+
+Classes:
+    Snapshot(values, parent, controls, events)
+        Description: One immutable node of a branch history
+        Methods:
+            of(rState): classmethod, returns a root node for a state
+            state(): Returns a new PlantState with the node's values
+            chain(): Returns the nodes from the root up to this one
+    Branch(node, model)
+        Description: Plays days on top of a node, model is an optional pwrsim.config.PlantModel
+        Methods:
+            fork(): Returns a new branch on the same node
+            step(rodPosition, pPump, sPump, ePump): Plays one day, returns events
+            advance(days, rodPosition, pPump, sPump, ePump): Holds the controls, stops early once the plant is destroyed or the game is over, returns events
+            toggleDamageControl(): Same as PWRCore.toggleDamageControl, returns the event
+            isOver(), endStats(): Same as PWRCore
+            state(): Returns a copy of the branch's current PlantState
+            history(): Returns the PlantStates from the root up to now
+            divergence(other): Returns the last node two branches share, None if they share none
+Functions:
+    project(branch, controls, days): Advances branch with controls held, returns the projection dict
+    explore(root, whatIfs, days, workers, processes, model): Returns one projection dict per what-if, in order.
+        A projection has controls, days played, the end state, events and profit, the change in endStats TrueProfit
+"""
+import multiprocessing
+import multiprocessing.pool
+
+from pwrsim import core
+from pwrsim.state import FIELDS, PlantState
+
+DAY = FIELDS.index('day')
+GAME_LENGTH = FIELDS.index('gameLength')
+DAMAGE = FIELDS.index('damage')
+
+
+class Snapshot():
+    __slots__ = ('values', 'parent', 'controls', 'events', 'depth')
+
+    def __init__(self, values, parent=None, controls=None, events=()):
+        self.values = values
+        self.parent = parent
+        self.controls = controls    #None for a root or a damage control toggle
+        self.events = events
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    @classmethod
+    def of(cls, rState):
+        return cls(rState.astuple())
+
+    def state(self):
+        return PlantState.fromTuple(self.values)
+
+    def chain(self):
+        nodes = []
+        node = self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    def __repr__(self):
+        return 'Snapshot(day=' + str(self.values[DAY]) + ', depth=' + str(self.depth) + ')'
+
+
+class Branch():
+    def __init__(self, node, model=None):
+        self.node = node
+        self.model = model
+        self.plant = None   #own PWRCore, only made when the branch first changes something
+
+    def own(self):  #copy on write
+        if self.plant is None:
+            self.plant = core.PWRCore(self.node.values[GAME_LENGTH], model=self.model)
+            self.plant.rState = self.node.state()
+        return self.plant
+
+    def fork(self):
+        return Branch(self.node, self.model)
+
+    def step(self, rodPosition, pPump, sPump, ePump):
+        plant = self.own()
+        events = plant.step(rodPosition, pPump, sPump, ePump)
+        self.node = Snapshot(plant.rState.astuple(), self.node, (rodPosition, pPump, sPump, ePump), tuple(events))
+        return events
+
+    def advance(self, days, rodPosition, pPump, sPump, ePump):
+        events = []
+        for day in range(days):
+            if self.isOver() or self.node.values[DAMAGE] >= 100:    #nothing to project past the end of the game
+                break
+            dayEvents = self.step(rodPosition, pPump, sPump, ePump)
+            events.extend(dayEvents)
+            if core.PLANT_DESTROYED in dayEvents:
+                break
+        return events
+
+    def toggleDamageControl(self):
+        plant = self.own()
+        event = plant.toggleDamageControl()
+        self.node = Snapshot(plant.rState.astuple(), self.node, None, (event,))
+        return event
+
+    def isOver(self):
+        return self.node.values[DAY] >= self.node.values[GAME_LENGTH]
+
+    def state(self):
+        return self.node.state()
+
+    def endStats(self):
+        return core.endStats(self.node.state())
+
+    def history(self):
+        return [node.state() for node in self.node.chain()]
+
+    def divergence(self, other):
+        a = self.node
+        b = other.node
+        while a.depth > b.depth:
+            a = a.parent
+        while b.depth > a.depth:
+            b = b.parent
+        while a is not b:
+            a = a.parent
+            b = b.parent
+            if a is None:   #different roots
+                return None
+        return a
+
+
+def project(branch, controls, days):
+    start = branch.node
+    events = branch.advance(days, *controls)
+    end = branch.node
+    return {'controls':tuple(controls), 'days':end.values[DAY] - start.values[DAY], 'state':end.state(), 'events':events,
+        'profit':core.endStats(end.state())['TrueProfit'] - core.endStats(start.state())['TrueProfit']}
+
+def projectTask(task):  #pool side, plays one what-if from a bare state tuple
+    values, controls, days, config = task
+    model = None
+    if config is not None:
+        from pwrsim import config as plantConfig    #only pool workers for a plant variant need it
+        model = plantConfig.compileModel(config)
+    return project(Branch(Snapshot(values), model), controls, days)
+
+def explore(root, whatIfs, days, workers=0, processes=True, model=None):
+    #root is a Snapshot or a PlantState, every what-if is a (rodPosition, pPump, sPump, ePump) tuple held for days.
+    #workers 0 plays them here on forks of one branch, otherwise on a process pool or with processes=False a thread pool
+    if not isinstance(root, Snapshot):
+        root = Snapshot.of(root)
+    if not workers:
+        base = Branch(root, model)
+        return [project(base.fork(), controls, days) for controls in whatIfs]
+    config = None if model is None else model.config
+    tasks = [(root.values, tuple(controls), days, config) for controls in whatIfs]
+    poolType = multiprocessing.Pool if processes else multiprocessing.pool.ThreadPool
+    with poolType(workers) as pool:
+        return pool.map(projectTask, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
@@ -0,0 +1,677 @@
+"""
+CSC308 Term Project: Python PWR Sim GUI
+Johnathon Glatz, Shawn Carl, Dalton Obitko
+4/25/2021 - v0.9
+"""
+"""
+Description: Basic simulation game for an older generation pressurized
+water fission reactor. GUI and terminal based. Provides player with
+control over the power plant's reactor control rods, primary coolant
+pumps, secondary coolant pumps, and emergency coolant pumps, as well
+as SCRAM controls and damage control teams. Game is turn based with
+an adjustable length of 5 to 150 turns. Primary objective is to generate
+as much power as possible in the turns
+
+Classes:
+    PWRSim()
+        Description: Tk view over the headless plant model in pwrsim.core
+        Methods:
+            __init__:
+                Description: Builds the window and widgets, does not start the mainloop
+                Parameters: gameLength, logPath (optional replay log to record turns to), instrument (optional pwrsim.instrument.Instrument to time each phase of a turn)
+                Returns:
+Functions:
+    loadTk():
+        Description: Imports tkinter the first time it is needed, importing this module does not load Tk
+        Returns: the tkinter module
+    main():
+        Description: Main function. Prompts user for game length between 5 and 150 then starts game based on user's answer
+        Parameters: None, pass --record PATH on the command line to write a replay log of every turn,
+            --profile PATH to write per phase timings as JSON and --trace PATH to write them as a Chrome trace,
+            --history PATH to save the day by day history of the run when the window closes
+        Returns: 0 on good execution
+            
+"""
+import sys
+import time
+from pwrsim import core   #headless plant model
+from pwrsim.replay import ReplayWriter  #turn by turn session logs
+from pwrsim.instrument import Instrument, NULL_PHASE   #opt in phase timings
+from pwrsim.history import PlantHistory   #day by day history of the run
+from pwrsim.trend import TrendChart   #strip chart next to the annunciator panel
+from pwrsim import fork   #what-if projections on forks of the plant state
+
+gui = None  #tkinter, imported by loadTk() when the first window is built so headless users of the package never load it
+
+FRAME_MS = 16   #auto run redraws the display at most once per screen frame
+TICK_BUDGET = 0.010     #seconds of simulation per auto run tick before handing control back to Tk
+
+#popup text for events the plant model raises during a day
+EVENT_MESSAGES = {
+    core.REPAIRS_COMPLETE:('Repairs complete', 'Repairs on the plant have been completed. Damage control measures deactivated.'),
+    core.DAMAGE_CONTROL_RECALLED:('Damage control parties recalled!', 'WARNING: Core temperatures exceeded 212F. All damage control teams have been recalled for safety.'),
+    core.PLANT_DESTROYED:('Game over', 'GAME OVER: You have destroyed the plant. Nearby gas turbine generators will take up the grid load, but thousands of families have been forced to evacuate the area. Be more careful next time!'),
+}
+
+def loadTk():  #import tkinter and its popups on first use
+    global gui
+    if gui is None:
+        import tkinter
+        import tkinter.messagebox
+        gui = tkinter
+    return gui
+
+#prints startup text block
+def help():
+    print('------------------------------------------------------------\n')
+    print("""
+Welcome to the Python Pressurized Water Reactor Sim!
+This is a gamified simulation of an older generation
+PWR power plant. PWRs are the most common form of
+power generating nuclear reactors in the world. Modern
+PWRs are incredibly safe and are designed to make
+meltdowns all but impossible. That being said, both TMI-2
+and Chernobyl No.4 were PWRs that failed due to poor
+ancillary equipment and operator training.
+In this sim you will control the daily operations
+at a brand new (for the 1970s) PWR power plant with
+a nameplate safe output rating of 500 MWe per day. You will
+be given full control of the reactor's control rod actuators,
+primary coolant pumps, seconday coolant pumps, and emergency
+coolant pumps. Your goal is to generate as much energy as
+possible in a set number of days without destroying the plant.
+Oh, one last thing. None of the safety interlocks are enabled,
+so a SCRAM will not be triggered automatically no matter how
+much damage the plant takes. A real leader goes down with
+the ship.
+Tips:
+    - Higher values for control rod depth raises the rods out
+    of the core. This increases core power output.
+    - The maximum safe temperature of the reactor is 700F
+    - The maximum safe temperature of the heat exhangers is 450F
+    - The maximum safe temperature of the condensor is 200F
+    Exceed any of these temperature limits and you will damage
+    the associated components. A damaged plant will tend to run
+    hotter and produce less power.
+    - A safe but inefficient way to start the plant is to set
+    primary and secondary coolant pumps to 100% and control rods
+    to 15%. This will bring the core to a safe generating
+    temperature, but it is very slow and wastes fuel.
+Stay safe and good luck!\n""")
+    print('------------------------------------------------------------\n')
+
+
+class PWRSim():
+    def __init__(self, gameLength, logPath=None, instrument=None):
+        loadTk()
+        self.instrument = instrument    #times each phase of a turn when set
+        self.core = core.PWRCore(gameLength, instrument)  #the gui is a view over the headless plant model
+        self.rState = self.core.rState
+        self.replayLog = None
+        if logPath is not None: #record every turn for replay
+            self.replayLog = ReplayWriter(logPath, gameLength)
+        
+        self.window = gui.Tk()  #create the window
+        self.window.minsize(880,280)    #set a minimum size x,y in pixels
+        self.window.columnconfigure((0,1,2,3,4,5), weight=1)   #set row and column weights for UI scaling
+        self.window.rowconfigure((0,1,2,3,4,5,6,7,8,9,10), weight=1)
+        self.window.title('Python Pressurized Water Reactor Simulator')  #give it a title bar
+
+        self.annPanel = gui.Canvas(self.window,width=100,height=100, bg='black')  #create a canvas for annunciator panel
+        self.annPanel.grid(row=0, rowspan=2, column=0, columnspan=5, sticky = 'NESW') #set the canvas onto the grid layout
+        self.trendPanel = gui.Canvas(self.window,width=300,height=100, bg='black', highlightthickness=0)  #create a canvas for the trend chart
+        self.trendPanel.grid(row=0, rowspan=2, column=5, sticky = 'NESW')
+        self.trend = TrendChart(self.trendPanel, gameLength, 300, 100)
+        self.trend.add(self.rState)  #day 1
+        self.trendPanel.bind('<Configure>', lambda event: self.trend.resize(event.width, event.height))
+
+        self.rodEntry = gui.Entry(width = 10, justify = 'center')   #create entry fields and place on grid layout
+        self.rodEntry.grid(row=2)
+        self.pcEntry = gui.Entry(width = 10, justify = 'center')
+        self.pcEntry.grid(row=2, column=1)
+        self.scEntry = gui.Entry(width = 10, justify = 'center')
+        self.scEntry.grid(row=2, column=2)
+        self.ecEntry = gui.Entry(width = 10, justify = 'center')
+        self.ecEntry.grid(row=2, column=3)
+
+        self.scramButton = gui.Button(text = 'SCRAM', width = 8, bg = '#a7a7a7', command = self.triggerScram)   #create scram button
+        self.scramButton.grid(row=2, column=4)
+        self.rodLabel = gui.Label(text = 'Control Rods')#create labels
+        self.rodLabel.grid(row=3)
+        self.pcLabel = gui.Label(text = 'Primary Coolant')
+        self.pcLabel.grid(row=3, column=1)
+        self.scLabel = gui.Label(text = 'Secondary Coolant')
+        self.scLabel.grid(row=3, column=2)
+        self.ecLabel = gui.Label(text = 'Emergency Coolant')
+        self.ecLabel.grid(row=3, column=3)
+        self.damageControlButton = gui.Button(text = 'Damage\nControl', width = 8, bg = '#a7a7a7', command = self.triggerDamageControl)#create damage control button
+        self.damageControlButton.grid(row=3, column=4)
+        self.rTempDisplay = gui.Label(text = format(self.rState.rTemp, '.2f') + ' F')
+        self.rTempDisplay.grid(row=4)
+        self.eTempDisplay = gui.Label(text = format(self.rState.eTemp, '.2f') + ' F')
+        self.eTempDisplay.grid(row=4, column=1)
+        self.cTempDisplay = gui.Label(text = format(self.rState.cTemp, '.2f') + ' F')
+        self.cTempDisplay.grid(row=4, column=2)
+        self.fuelDisplay = gui.Label(text = format(self.rState.fuel, '.2f') + ' %')
+        self.fuelDisplay.grid(row=4, column=3)
+        self.damageDisplay = gui.Label(text = str(self.rState.damage) + ' %')
+        self.damageDisplay.grid(row=4, column=4)
+        self.rTempLabel = gui.Label(text = 'Reactor Temp')
+        self.rTempLabel.grid(row=5)
+        self.eTempLabel = gui.Label(text = 'Exchanger Temp')
+        self.eTempLabel.grid(row=5, column=1)
+        self.cTempLabel = gui.Label(text = 'Condensor Temp')
+        self.cTempLabel.grid(row=5, column=2)
+        self.fuelLabel = gui.Label(text = 'Fuel')
+        self.fuelLabel.grid(row=5, column=3)
+        self.damageLabel = gui.Label(text = 'Damage')
+        self.damageLabel.grid(row=5, column=4)
+        self.dayDisplay = gui.Label(text = str(self.rState.day) + ' / ' + str(self.rState.gameLength))
+
+        self.layoutLine = gui.Canvas(self.window,width=100,height=1, bg='black')  #create a canvas for annunciator panel
+        self.layoutLine.grid(row=6, rowspan=1, column=0, columnspan=5, sticky = 'NESW') #set the canvas onto the grid layout
+        
+        self.dayDisplay.grid(row=7)
+        self.dailyPowerDisplay = gui.Label(text = format(self.rState.dailyOutput, '.3f') + ' MWe')
+        self.dailyPowerDisplay.grid(row=7, column=1)
+        self.totalPowerDisplay = gui.Label(text = format(self.rState.totalOutput, '.3f') + ' MWe')
+        self.totalPowerDisplay.grid(row=7, column=2)
+        self.dayLabel = gui.Label(text = 'Current Day').grid(row=8)
+        self.dailyPowerLabel = gui.Label(text = 'Daily Power Generated')
+        self.dailyPowerLabel.grid(row=8, column=1)
+        self.totalPowerLabel = gui.Label(text = 'Total Power Generated')
+        self.totalPowerLabel.grid(row=8, column=2)
+        self.helpButton = gui.Button(text = 'Help', width = 8, bg = '#a7a7a7', command = self.helpscreen) #create help button
+        self.helpButton.grid(row=7, column=4)
+        self.nextDayButton = gui.Button(text = 'Next Day', width = 8, bg = '#a7a7a7', command = self.gameloop) #create next day button
+        self.nextDayButton.grid(row=8, column=4)
+        self.rateEntry = gui.Entry(width = 10, justify = 'center')  #auto run speed in days per second, 0 for as fast as possible
+        self.rateEntry.insert(0, '10')
+        self.rateEntry.grid(row=7, column=3)
+        self.autoRunButton = gui.Button(text = 'Auto Run', width = 8, bg = '#a7a7a7', command = self.toggleAutoRun) #create auto run button
+        self.autoRunButton.grid(row=8, column=3)
+        self.statusBar = gui.Label(text = 'Auto Run speed is set in days/sec above the button, 0 runs as fast as possible.', anchor = 'w', relief = gui.SUNKEN)
+        self.rTempWhatIf = gui.Label(text = '')    #What If projections, under the current values they project
+        self.rTempWhatIf.grid(row=9)
+        self.eTempWhatIf = gui.Label(text = '')
+        self.eTempWhatIf.grid(row=9, column=1)
+        self.cTempWhatIf = gui.Label(text = '')
+        self.cTempWhatIf.grid(row=9, column=2)
+        self.fuelWhatIf = gui.Label(text = '')
+        self.fuelWhatIf.grid(row=9, column=3)
+        self.damageWhatIf = gui.Label(text = '')
+        self.damageWhatIf.grid(row=9, column=4)
+        self.whatIfFrame = gui.Frame(self.window)
+        self.whatIfFrame.grid(row=9, column=5)
+        self.whatIfDaysEntry = gui.Entry(self.whatIfFrame, width = 5, justify = 'center')   #days to project ahead
+        self.whatIfDaysEntry.insert(0, '10')
+        self.whatIfDaysEntry.pack(side=gui.LEFT)
+        self.whatIfButton = gui.Button(self.whatIfFrame, text = 'What If', width = 8, bg = '#a7a7a7', command = self.whatIf)
+        self.whatIfButton.pack(side=gui.LEFT, padx=4)
+        self.whatIfShown = False
+        self.statusBar.grid(row=10, column=0, columnspan=6, sticky = 'EW')
+
+        self.autoRunning = False    #auto run state
+        self.autoRate = 0
+        self.autoStart = 0.0
+        self.autoDays = 0
+        self.lastRefresh = 0.0
+
+        #fill in annunciator panel, x and y position are center of text
+        self.damageControlAnn = self.annPanel.create_text(58,30, text='DAMAGE\nCONTROL', justify=gui.CENTER, fill='red', state=gui.HIDDEN) #annunciators red when on, hidden when off for colorblind accessibility
+        self.rTempAnn = self.annPanel.create_text(174,30, text='REACTOR\nOVERTEMP', justify=gui.CENTER, fill='red', state=gui.HIDDEN)
+        self.eTempAnn = self.annPanel.create_text(290,30, text='EXCHANGER\nOVERTEMP', justify=gui.CENTER, fill='red', state=gui.HIDDEN)
+        self.cTempAnn = self.annPanel.create_text(406,30, text='CONDENSOR\nOVERTEMP', justify=gui.CENTER, fill='red', state=gui.HIDDEN)
+        self.powerLimitAnn = self.annPanel.create_text(522,30, text='OVER POWER\nLIMIT', justify=gui.CENTER, fill='red', state=gui.HIDDEN)
+        self.genOfflineAnn = self.annPanel.create_text(58,70, text='GENERATORS\nOFFLINE', justify=gui.CENTER, fill='red', state=gui.NORMAL)
+        self.lowPAnn = self.annPanel.create_text(174,70, text='LOW PRIMARY\nFLOW', justify=gui.CENTER, fill='red', state=gui.NORMAL)
+        self.lowCAnn = self.annPanel.create_text(290,70, text='LOW SECONDARY\nFLOW', justify=gui.CENTER, fill='red', state=gui.NORMAL)
+        self.eOpenAnn = self.annPanel.create_text(406,70, text='EMERGENCY\nCOOLANT', justify=gui.CENTER, fill='red', state=gui.HIDDEN)
+        self.lowFuelAnn = self.annPanel.create_text(522,70, text='LOW FISSION\nFUEL', justify=gui.CENTER, fill='red', state=gui.HIDDEN)
+
+        #last values shown on screen so a refresh only makes Tk calls for what changed
+        self.annItems = (self.damageControlAnn, self.rTempAnn, self.eTempAnn, self.cTempAnn, self.powerLimitAnn,
+            self.genOfflineAnn, self.lowPAnn, self.lowCAnn, self.eOpenAnn, self.lowFuelAnn)   #same order as core.ANNUNCIATORS
+        self.annShown = [self.annPanel.itemcget(item, 'state') == gui.NORMAL for item in self.annItems]
+        self.labelValues = {}
+        self.labelText = {widget:widget.cget('text') for widget in (self.rTempDisplay, self.eTempDisplay, self.cTempDisplay,
+            self.fuelDisplay, self.damageDisplay, self.dayDisplay, self.dailyPowerDisplay, self.totalPowerDisplay)}
+        self.refreshStats = {'labelUpdates':0, 'labelSkips':0, 'annUpdates':0, 'annSkips':0}
+
+    def helpscreen(self):
+        self.stopAutoRun()  #help is modal
+        helpStr = """
+Welcome to the Python Pressurized Water Reactor Simulator!
+
+At the top of the GUI is a black box. You might see some red
+text here. These are annunciators or warning lights for the
+power plant. Ideally, you want these all to disappear (except
+the "OVER POWER LIMIT" light). That one is actually a good
+sign if you aren't overheating the plant. You should also see 4
+gray buttons on the right. The SCRAM button, short for
+"Safety Rod Axe Man" if you're a fan of Enrico Fermi, is a last
+ditch, fast method to shut down a fission reactor.
+
+In the real world this would plunge the control rods and likely
+inject a neutron poison such as boron into the coolant. In the
+sim it is simply a way to end game at any time you wish.
+
+The damage control button is used to dispatch damage
+control teams to slowly repair the plant as long as the
+reactor temperature remains below 212F. This may be
+neccessary if you are playing a long game and trying for a
+high power output.
+
+The help button get you to this screen and the next day
+button simply advances the day count forward and calculates
+the new plant state.
+
+The What If button plays the control inputs you have typed in
+ahead for the number of days in the box next to it, on a copy
+of the plant, and shows where the temperatures, fuel and damage
+would end up under the current values. The status bar shows the
+change in True Profit, and which control rod setting would have
+done best with the same pumps. The real plant is not touched.
+
+The Auto Run button plays the days for you at the speed typed in
+the box above it, in days per second (0 runs as fast as possible),
+using whatever control inputs are set. Warnings show up in the
+status bar at the bottom instead of popups. Press it again, SCRAM
+or Help to stop.
+
+Directly under the black annunciator panel is 4 text entry
+fields. These are where you set the control input for the
+reactor control rods, primary coolant, secondary coolant,
+and emergency coolant.
+All of these must be integer values between 0 and 100.
+
+The control rods are the reactor's neutron moderators. A
+higher value means less control rod in the reactor, thus less
+moderation and a higher heat output. The energy in the plant
+flows from reactor to condensor through the exchangers via coolant.
+More coolant flow means more energy travel.
+
+Ideally, all of the reactors heat should be taken up by the
+exchangers, driving the generators. Any heat in the condensors
+is wasted energy.
+
+The term "Emergency Coolant" is somewhat of a misnomer. In
+the real world emergency coolant tanks are not only used in
+emergencies but also in the daily operation of the plant to
+refill the coolant loop to account for leaks.
+
+As this game does not simulate coolant levels or leaks, you
+may instead use it as a backup to the primary coolant if you
+must pull more heat out of the reactor than the primary loop can sustain.
+This should be all you need to get the reactor going.
+
+Remember, it is only a simulation so part of the fun is learning the mechanics on your own!"""
+        gui.messagebox.showinfo(title='Help', message=str(helpStr));
+
+    def updateEntries(self):    #return True on success, False for bad values
+        temp = 0
+        validInputs = True
+
+        try:
+            temp = int(self.rodEntry.get())
+            if(temp >= 0 and temp <= 100):
+                self.rState.rodPosition = temp
+            else:
+                validInputs = False
+        except:
+            validInputs = False
+            
+        try:
+            temp = int(self.pcEntry.get())
+            if(temp >= 0 and temp <= 100):
+                self.rState.pPump = temp
+            else:
+                validInputs = False
+        except:
+            validInputs = False
+            
+        try:
+            temp = int(self.scEntry.get())
+            if(temp >= 0 and temp <= 100):
+                self.rState.sPump = temp
+            else:
+                validInputs = False
+        except:
+            validInputs = False
+            
+        try:
+            temp = int(self.ecEntry.get())
+            if(temp >= 0 and temp <= 100):
+                self.rState.ePump = temp
+            else:
+                validInputs = False
+        except:
+            validInputs = False
+
+        return validInputs
+
+    def readEntries(self):  #control inputs as a tuple without touching the plant, None if any is bad
+        controls = []
+        for entry in (self.rodEntry, self.pcEntry, self.scEntry, self.ecEntry):
+            try:
+                value = int(entry.get())
+            except ValueError:
+                return None
+            if(value < 0 or value > 100):
+                return None
+            controls.append(value)
+        return tuple(controls)
+
+    def phase(self, name):  #times the with block as one call of name when instrumenting, otherwise does nothing
+        if self.instrument is None:
+            return NULL_PHASE
+        return self.instrument.phase(name)
+
+    def gameloop(self):
+        print('DEBUG: gameloop triggered')
+
+        with self.phase('turn'):
+            if(self.core.isOver()):  #check if the day counter is up
+                with self.phase('messagebox'):
+                    gui.messagebox.showinfo(title='Game over', message=str('GAME OVER: Your ' + str(self.rState.day) + " days are up. Let's see how you did."))
+                self.endScreen()
+            else:
+                with self.phase('input'):
+                    validInputs = self.updateEntries()
+                if(validInputs != True):    #if we have bad input do not update the game state, instead throw an error popup
+                    with self.phase('messagebox'):
+                        gui.messagebox.showerror(title='INPUT ERROR', message='Rod position, primary, secondary, and emergency pumps must be set to an integer value between 0 and 100 to continue!')
+                else:
+                    self.playTurn()
+                    self.refresh()
+
+    def playTurn(self): #advance one day with the current inputs and log it if recording
+        if(self.whatIfShown):   #projections are from the day before
+            self.clearWhatIf()
+        damageControl = self.rState.damageControl  #damage control going into the turn, for the replay log
+        self.updatePlantState()
+        if self.replayLog is not None:
+            with self.phase('replayLog'):
+                self.replayLog.record((self.rState.rodPosition, self.rState.pPump, self.rState.sPump, self.rState.ePump), damageControl, self.rState)
+
+    def refresh(self):  #redraw the labels, annunciators and trend chart
+        with self.phase('labels'):
+            self.updateLabels()
+        with self.phase('annunciators'):
+            self.updateAnnunciators()
+        with self.phase('trend'):
+            self.trend.draw()
+
+    def updatePlantState(self):
+        events = self.core.step(self.rState.rodPosition, self.rState.pPump, self.rState.sPump, self.rState.ePump)
+        self.trend.add(self.rState)  #drawn with the labels on the next refresh
+
+        for event in events:    #show the popups for anything that happened during the day
+            title, message = EVENT_MESSAGES[event]
+            if(event == core.PLANT_DESTROYED):
+                self.stopAutoRun()
+                self.refresh()
+                with self.phase('messagebox'):
+                    gui.messagebox.showinfo(title=title, message=message)
+                self.endScreen()
+            else:
+                self.notify(title, message)
+
+    def notify(self, title, message):   #popup when playing by hand, status bar line during auto run so nothing blocks
+        if(self.autoRunning):
+            self.statusBar.config(text='Day ' + str(self.rState.day) + ': ' + message)
+        else:
+            with self.phase('messagebox'):
+                gui.messagebox.showinfo(title=title, message=message)
+
+    def toggleAutoRun(self):
+        if(self.autoRunning):
+            self.stopAutoRun()
+            return
+        try:
+            rate = float(self.rateEntry.get())
+        except ValueError:
+            rate = -1
+        if(rate < 0):
+            gui.messagebox.showerror(title='INPUT ERROR', message='Auto run speed must be a number of days per second, or 0 to run as fast as possible.')
+            return
+        if((self.updateEntries()) != True):
+            gui.messagebox.showerror(title='INPUT ERROR', message='Rod position, primary, secondary, and emergency pumps must be set to an integer value between 0 and 100 to continue!')
+            return
+        self.autoRunning = True
+        self.autoRate = rate
+        self.autoStart = time.perf_counter()
+        self.autoDays = 0
+        self.autoRunButton.config(text='Stop')
+        self.nextDayButton.config(state=gui.DISABLED)
+        self.statusBar.config(text='Auto run started.')
+        self.window.after(0, self.autoStep)
+
+    def stopAutoRun(self):
+        if(self.autoRunning):
+            self.autoRunning = False
+            self.autoRunButton.config(text='Auto Run')
+            self.nextDayButton.config(state=gui.NORMAL)
+
+    def autoStep(self): #one timer tick of auto run, plays every day that is due then reschedules itself
+        if(not self.autoRunning):
+            return
+        with self.phase('input'):
+            validInputs = self.updateEntries()
+        if(validInputs != True):     #inputs can be changed while running, stop on bad ones instead of popping up
+            self.stopAutoRun()
+            self.statusBar.config(text='Auto run stopped: control inputs must be integers between 0 and 100.')
+            return
+
+        tickStart = time.perf_counter()
+        if(self.autoRate == 0):     #as fast as possible, bounded by the tick budget
+            due = -1
+        else:
+            due = int((tickStart - self.autoStart) * self.autoRate) - self.autoDays
+        while(due != 0 and self.autoRunning):
+            if(self.core.isOver()):
+                self.stopAutoRun()
+                self.refresh()
+                with self.phase('messagebox'):
+                    gui.messagebox.showinfo(title='Game over', message=str('GAME OVER: Your ' + str(self.rState.day) + " days are up. Let's see how you did."))
+                self.endScreen()
+                return
+            self.playTurn()
+            self.autoDays += 1
+            due -= 1
+            if(time.perf_counter() - tickStart >= TICK_BUDGET):
+                break
+
+        now = time.perf_counter()
+        if(now - self.lastRefresh >= FRAME_MS / 1000 or not self.autoRunning):  #coalesce display updates to the frame rate
+            self.refresh()
+            self.lastRefresh = now
+        if(self.autoRunning):
+            if(self.autoRate == 0):
+                delay = 1
+            else:
+                delay = max(1, int(1000 / self.autoRate) - int((now - tickStart) * 1000))
+            self.window.after(min(delay, FRAME_MS), self.autoStep)
+
+    def whatIf(self):   #project the typed inputs ahead on forks of the plant, the live game is not changed
+        controls = self.readEntries()
+        try:
+            days = int(self.whatIfDaysEntry.get())
+        except ValueError:
+            days = 0
+        if(controls is None or days < 1):
+            self.statusBar.config(text='What If needs control inputs between 0 and 100 and a whole number of days above 0.')
+            return
+        with self.phase('whatIf'):
+            root = fork.Snapshot.of(self.rState)
+            rods = sorted(set(range(0, 101, 5)) | {controls[0]})   #the typed rods plus every 5% with the same pumps
+            results = fork.explore(root, [(rod,) + controls[1:] for rod in rods], days, model=self.core.model)
+        typed = results[rods.index(controls[0])]
+        best = max(results, key=lambda result: result['profit'])
+        state = typed['state']
+        self.rTempWhatIf.config(text='-> ' + format(state.rTemp, '.2f') + ' F')
+        self.eTempWhatIf.config(text='-> ' + format(state.eTemp, '.2f') + ' F')
+        self.cTempWhatIf.config(text='-> ' + format(state.cTemp, '.2f') + ' F')
+        self.fuelWhatIf.config(text='-> ' + format(state.fuel, '.2f') + ' %')
+        self.damageWhatIf.config(text='-> ' + str(state.damage) + ' %')
+        self.whatIfShown = True
+        message = ('What if for ' + str(typed['days']) + ' days (to day ' + str(state.day) + '): True Profit $'
+            + format(typed['profit']/1000000, '+.2f') + 'Mil, best with these pumps is rods ' + str(best['controls'][0])
+            + ' at $' + format(best['profit']/1000000, '+.2f') + 'Mil')
+        if(core.PLANT_DESTROYED in typed['events']):
+            message += '. WARNING: the plant is destroyed on day ' + str(state.day - 1)
+        self.statusBar.config(text=message)
+
+    def clearWhatIf(self):
+        for widget in (self.rTempWhatIf, self.eTempWhatIf, self.cTempWhatIf, self.fuelWhatIf, self.damageWhatIf):
+            widget.config(text='')
+        self.whatIfShown = False
+
+    def setAnnunciator(self, index, on):    #show or hide one light, skipped if it is already that way
+        if(self.annShown[index] == on):
+            self.refreshStats['annSkips'] += 1
+            return
+        if(on):
+            self.annPanel.itemconfig(self.annItems[index], state=gui.NORMAL)
+        else:
+            self.annPanel.itemconfig(self.annItems[index], state=gui.HIDDEN)
+        self.annShown[index] = on
+        self.refreshStats['annUpdates'] += 1
+
+    def setLabel(self, widget, value, fmt, suffix):    #format and show a value, skipped if the value or text is unchanged
+        if(widget in self.labelValues and self.labelValues[widget] == value):
+            self.refreshStats['labelSkips'] += 1
+            return
+        self.labelValues[widget] = value
+        if(fmt is None):
+            text = str(value) + suffix
+        else:
+            text = format(value, fmt) + suffix
+        if(self.labelText.get(widget) == text):
+            self.refreshStats['labelSkips'] += 1
+            return
+        widget.config(text=text)
+        self.labelText[widget] = text
+        self.refreshStats['labelUpdates'] += 1
+
+    def updateAnnunciators(self):   #update the annunciator panel lights
+        for index, on in enumerate(core.annunciators(self.rState)):
+            self.setAnnunciator(index, on)
+
+    def updateLabels(self): #Update all of the plant state labels
+        self.setLabel(self.rTempDisplay, self.rState.rTemp, '.2f', ' F')
+        self.setLabel(self.eTempDisplay, self.rState.eTemp, '.2f', ' F')
+        self.setLabel(self.cTempDisplay, self.rState.cTemp, '.2f', ' F')
+        self.setLabel(self.fuelDisplay, self.rState.fuel, '.2f', ' %')
+        self.setLabel(self.damageDisplay, self.rState.damage, None, ' %')
+        self.setLabel(self.dayDisplay, self.rState.day, None, ' / ' + str(self.rState.gameLength))
+        self.setLabel(self.dailyPowerDisplay, self.rState.dailyOutput, '.3f', ' MWe')
+        self.setLabel(self.totalPowerDisplay, self.rState.totalOutput, '.3f', ' MWe')
+
+    def triggerScram(self): #end the game early if user accepts prompt
+        self.stopAutoRun()  #the confirmation is modal, do not keep playing behind it
+        userReturn = gui.messagebox.askyesno(title='Are you sure?', message='Are you sure you want to SCRAM the reactor?.')
+        if(userReturn == True):
+            self.endScreen()
+            
+    def triggerDamageControl(self):
+        event = self.core.toggleDamageControl()
+        if(self.whatIfShown):
+            self.clearWhatIf()
+        self.setAnnunciator(0, self.rState.damageControl)
+        if(event == core.DAMAGE_CONTROL_DEACTIVATED):
+            self.notify('Damage control deactivated', 'Damage control measures deactivated.')
+        elif(event == core.DAMAGE_CONTROL_ACTIVATED):
+            self.notify('Damage control activated', 'Damage control measures activated. Keep core temperatures below 212F for crew safety!')
+        else:
+            self.notify('Core temperatures too high', 'Reactor core temperatures are too high to send in the repair crews. Lower temperatures to <212F and try again.')
+
+    def endScreen(self):
+        #print out game statistics, add in a profit/losses metric based on power generated and ending damage
+        stats = self.core.endStats()
+        Profit = stats['Profit']
+        TrueLosses = stats['TrueLosses']
+        TrueProfit = stats['TrueProfit']   #divide cash amounts out to millions
+        
+        endScreenStr = str(
+
+        'Days Total Completed = ' + str(self.rState.day)
+        
+        + '\nTotal Power Generated = ' + format(self.rState.totalOutput, '.3f') + ' MWe'
+        
+        + '\nEnding Damage Percentage = ' + str(self.rState.damage) + ' %'
+        
+        + '\nProfit = $' + format((Profit/1000000), '.2f') + 'Mil'
+        
+        + '\nLosses = $' + format((TrueLosses/1000000), '.2f') + 'Mil'
+        
+        + '\nTrue Profit = $' + format((TrueProfit/1000000), '.2f') + 'Mil'
+
+        )
+        
+        with self.phase('messagebox'):
+            gui.messagebox.showinfo(title='Statistics', message=endScreenStr);
+        
+def main():
+    validInput = False
+    gameLength = 100
+    
+    #On startup output help prompt then get a game length from user
+    help()
+    while validInput == False:
+        userin = input('Input a game length in days (min:5 max:150) or press enter to play\nwith the default 100 day game: ')
+        if userin == '':
+            validInput = True
+        else:
+            try:
+                userin = int(userin)
+                if userin >= 5 and userin <= 150:
+                    gameLength= userin
+                    validInput = True
+                else:
+                    print('ERROR: Game length must be between 5 and 150 days.')
+            except:
+                print('ERROR: Invalid length. Please use a positive integer between 5 and 150 only.')
+
+    logPath = None
+    if '--record' in sys.argv[:-1]: #optional replay log: --record session.pwrlog
+        logPath = sys.argv[sys.argv.index('--record') + 1]
+        print('Recording turns to', logPath)
+
+    profilePath = None
+    tracePath = None
+    instrument = None
+    if '--profile' in sys.argv[:-1]:    #optional phase timings: --profile profile.json and/or --trace trace.json
+        profilePath = sys.argv[sys.argv.index('--profile') + 1]
+    if '--trace' in sys.argv[:-1]:
+        tracePath = sys.argv[sys.argv.index('--trace') + 1]
+    if profilePath is not None or tracePath is not None:
+        instrument = Instrument()
+
+    print('Game length set to', gameLength, 'days.')
+    print('Starting...')
+    
+    pwrWindow = PWRSim(gameLength, logPath, instrument)    #Start the game with gui
+    history = None
+    if '--history' in sys.argv[:-1]:    #optional run history: --history session.pwrhist
+        history = PlantHistory(gameLength)
+        history.attach(pwrWindow.core)
+    gui.mainloop()  #start tkinter mainloop to wait for gui events
+
+    if history is not None:
+        historyPath = sys.argv[sys.argv.index('--history') + 1]
+        history.save(historyPath)
+        print('Run history written to', historyPath)
+
+    if instrument is not None:
+        print(instrument.summary())
+        if profilePath is not None:
+            instrument.dumpJson(profilePath)
+            print('Phase timings written to', profilePath)
+        if tracePath is not None:
+            instrument.dumpChromeTrace(tracePath)
+            print('Chrome trace written to', tracePath)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
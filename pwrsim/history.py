@@ -0,0 +1,212 @@
+"""
+Description: Day by day history for one Python PWR Sim run. PlantHistory
+keeps one preallocated typed array per PlantState field, sized to the
+game length up front (and doubled if a run goes past it), so recording a
+day is a row of stores into existing arrays. A history saves to a
+columnar file that HistoryFile maps back in, so thousands of finished
+runs can be read by mapping their files instead of playing them again.
+
+File layout (all little endian):
+    8 byte magic, uint32 header length, JSON header, then the data block
+    from the next 8 byte boundary with one column after another, each
+    starting on an 8 byte boundary. The header lists rows, gameLength and
+    for every column its name, struct type code, byte offset from the
+    start of the data block and byte length.
+
+Usage:
+    history = PlantHistory(150)
+    plant = core.playGame(150, schedule, history=history)
+    history.save('run.pwrhist')
+    with HistoryFile('run.pwrhist') as run:
+        peak = max(run.column('rTemp'))
+
+    python -m pwrsim.history runs/*.pwrhist     summary line per file
+
+Classes:
+    PlantHistory(gameLength)
+        Description: In memory columns for one run
+        Methods:
+            attach(plant): Records the plant's current state and every day it steps from now on
+            append(rState): Records one state
+            column(name): Returns a memoryview over the recorded values of one field
+            row(i): Returns the PlantState recorded at row i
+            save(path): Writes the columnar file
+    HistoryFile(path)
+        Description: Memory mapped read only view of a saved history, same column/row/len as PlantHistory
+        Methods:
+            close(): Unmap and close the file, release any column views first
+"""
+import argparse
+import array
+import json
+import mmap
+import re
+import struct
+import sys
+
+from pwrsim.state import FIELDS, RECORD, PlantState
+
+MAGIC = b'PWRHIST\x00'
+VERSION = 1
+PREFIX = struct.Struct('<8sI')
+ALIGN = 8
+
+ARRAY_CODES = {'i':'i', 'q':'q', 'd':'d', '?':'b'}    #struct code -> array typecode
+
+
+def fieldCodes(fmt):    #'<4i3d' -> ('i', 'i', 'i', 'i', 'd', 'd', 'd')
+    codes = []
+    for count, code in re.findall(r'(\d*)(\D)', fmt.lstrip('<')):
+        codes.extend(code * int(count or 1))
+    return tuple(codes)
+
+FIELD_CODES = fieldCodes(RECORD.format)     #taken from the packed PlantState layout so the two never disagree
+
+def aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def makeState(values):  #PlantState from one row of column values, the bool columns are stored as bytes
+    state = PlantState.fromTuple(values)
+    state.damageControl = bool(state.damageControl)
+    state.scram = bool(state.scram)
+    return state
+
+
+class PlantHistory():
+    def __init__(self, gameLength=100):
+        self.gameLength = gameLength
+        self.rows = 0
+        self.capacity = max(1, gameLength)
+        self.columns = [array.array(ARRAY_CODES[code], bytes(self.capacity * struct.calcsize(ARRAY_CODES[code]))) for code in FIELD_CODES]
+
+    def __len__(self):
+        return self.rows
+
+    def grow(self):     #double every column, only needed if a run outlasts gameLength
+        for values in self.columns:
+            values.extend(values)
+        self.capacity *= 2
+
+    def append(self, rState):
+        if self.rows == self.capacity:
+            self.grow()
+        row = self.rows
+        for values, value in zip(self.columns, rState.astuple()):
+            values[row] = value
+        self.rows = row + 1
+
+    def hook(self, rState, controls, events):   #PWRCore step hook
+        self.append(rState)
+
+    def attach(self, plant):
+        self.append(plant.rState)
+        plant.addStepHook(self.hook)
+
+    def column(self, name):
+        return memoryview(self.columns[FIELDS.index(name)])[:self.rows]
+
+    def row(self, i):
+        if i < 0:
+            i += self.rows
+        if i < 0 or i >= self.rows:
+            raise IndexError('history row out of range')
+        return makeState([values[i] for values in self.columns])
+
+    def save(self, path):
+        columns = []
+        offset = 0
+        for name, code, values in zip(FIELDS, FIELD_CODES, self.columns):
+            length = self.rows * values.itemsize
+            columns.append({'name':name, 'type':code, 'offset':offset, 'length':length})
+            offset = aligned(offset + length)
+        headerBytes = json.dumps({'version':VERSION, 'rows':self.rows, 'gameLength':self.gameLength, 'columns':columns}).encode()
+        start = aligned(PREFIX.size + len(headerBytes))
+
+        with open(path, 'wb') as f:
+            f.write(PREFIX.pack(MAGIC, len(headerBytes)))
+            f.write(headerBytes)
+            for column, values in zip(columns, self.columns):
+                f.write(bytes(start + column['offset'] - f.tell()))     #pad up to the column's boundary
+                values = values[:self.rows]
+                if sys.byteorder != 'little':
+                    values.byteswap()
+                values.tofile(f)
+
+
+class HistoryFile():
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, headerLength = PREFIX.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(path + ' is not a history file')
+        self.header = json.loads(self.map[PREFIX.size:PREFIX.size + headerLength])
+        if self.header['version'] != VERSION:
+            self.close()
+            raise ValueError(path + ' is history file version ' + str(self.header['version']))
+        self.rows = self.header['rows']
+        self.gameLength = self.header['gameLength']
+        self.layout = {column['name']:column for column in self.header['columns']}
+        self.start = aligned(PREFIX.size + headerLength)    #column offsets count from here
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        self.close()
+        return False
+
+    def column(self, name):
+        column = self.layout[name]
+        code = ARRAY_CODES[column['type']]
+        offset = self.start + column['offset']
+        data = memoryview(self.map)[offset:offset + column['length']]
+        if sys.byteorder != 'little':   #file is little endian, big endian hosts get a swapped copy
+            values = array.array(code, data)
+            data.release()
+            values.byteswap()
+            return memoryview(values)
+        return data.cast(code)
+
+    def row(self, i):
+        if i < 0:
+            i += self.rows
+        if i < 0 or i >= self.rows:
+            raise IndexError('history row out of range')
+        values = []
+        for name in FIELDS:
+            view = self.column(name)
+            values.append(view[i])
+            view.release()
+        return makeState(values)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize saved PWR sim run histories.')
+    parser.add_argument('files', nargs='+', help='history files written by PlantHistory.save')
+    args = parser.parse_args(argv)
+    for path in args.files:
+        with HistoryFile(path) as run:
+            rTemp = run.column('rTemp')
+            damage = run.column('damage')
+            totalOutput = run.column('totalOutput')
+            print(path + ':', run.rows, 'days, peak core', format(max(rTemp), '.2f'), 'F, peak damage', max(damage),
+                '%, total output', format(totalOutput[-1] if run.rows else 0, '.3f'), 'MWe')
+            rTemp.release()
+            damage.release()
+            totalOutput.release()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""
+Description: Opt in timing for the Python PWR Sim. An Instrument collects
+per phase call counts, cumulative, min and max times and a power of two
+latency histogram, plus a bounded list of individual timings that can be
+written out as a Chrome trace (load it in chrome://tracing or Perfetto)
+to see where a slow turn went: input parsing, the physics or damage model,
+Tk label and annunciator updates, or a messagebox waiting on the player.
+
+Nothing here is used unless an Instrument is handed to PWRCore or PWRSim.
+
+Usage:
+    inst = Instrument()
+    plant = core.PWRCore(100, inst)
+    with inst.phase('myPhase'):
+        ...
+    inst.dumpJson('profile.json')
+    inst.dumpChromeTrace('trace.json')
+
+Classes:
+    Instrument(maxEvents)
+        Description: Timings for any number of named phases
+        Methods:
+            phase(name): Returns a context manager that times its body as one call of name
+            record(name, start, end): Adds one timing from perf_counter_ns values
+            count(name, n): Adds to a plain counter, e.g. how often an event was raised
+            asDict(): Returns the stats as a JSON ready dict
+            summary(): Returns a printable table of the phases
+            dumpJson(path): Writes asDict() to path
+            dumpChromeTrace(path): Writes the recorded timings in Chrome trace event format
+            reset(): Drops everything recorded so far
+"""
+import contextlib
+import json
+import os
+import time
+from collections import deque
+
+NULL_PHASE = contextlib.nullcontext()   #stand in for phase() when nothing is being instrumented
+
+
+class PhaseStats():
+    __slots__ = ('calls', 'totalNs', 'minNs', 'maxNs', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.totalNs = 0
+        self.minNs = None
+        self.maxNs = 0
+        self.buckets = {}   #bit length of the duration in ns -> calls, so bucket b holds durations below 2**b ns
+
+    def add(self, duration):
+        self.calls += 1
+        self.totalNs += duration
+        if self.minNs is None or duration < self.minNs:
+            self.minNs = duration
+        if duration > self.maxNs:
+            self.maxNs = duration
+        bucket = duration.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def asDict(self):
+        return {'calls':self.calls, 'totalMs':self.totalNs / 1e6, 'meanUs':self.totalNs / self.calls / 1e3 if self.calls else 0.0,
+            'minUs':(self.minNs or 0) / 1e3, 'maxUs':self.maxNs / 1e3,
+            'histogramUs':{'<' + format(2**bucket / 1e3, 'g'):calls for bucket, calls in sorted(self.buckets.items())}}
+
+
+class Timer():  #context manager returned by Instrument.phase
+    __slots__ = ('instrument', 'name', 'start')
+
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        self.instrument.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Instrument():
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self, maxEvents=100000):
+        self.maxEvents = maxEvents
+        self.reset()
+
+    def reset(self):
+        self.origin = time.perf_counter_ns()
+        self.phases = {}
+        self.counters = {}
+        self.events = deque(maxlen=self.maxEvents)  #(name, start, end) of the latest timings for the trace
+
+    def phase(self, name):
+        return Timer(self, name)
+
+    def record(self, name, start, end):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = PhaseStats()
+            self.phases[name] = stats
+        stats.add(end - start)
+        self.events.append((name, start, end))
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def asDict(self):
+        return {'phases':{name:stats.asDict() for name, stats in self.phases.items()}, 'counters':dict(self.counters)}
+
+    def summary(self):
+        lines = [format('phase', '14s') + format('calls', '>10s') + format('total ms', '>12s') + format('mean us', '>12s') + format('max us', '>12s')]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].totalNs):
+            lines.append(format(name, '14s') + format(stats.calls, '10d') + format(stats.totalNs / 1e6, '12.3f')
+                + format(stats.totalNs / stats.calls / 1e3, '12.2f') + format(stats.maxNs / 1e3, '12.2f'))
+        for name, n in sorted(self.counters.items()):
+            lines.append(format(name, '30s') + format(n, '10d'))
+        return '\n'.join(lines)
+
+    def dumpJson(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.asDict(), f, indent=1)
+
+    def dumpChromeTrace(self, path):
+        pid = os.getpid()
+        trace = [{'name':name, 'ph':'X', 'ts':(start - self.origin) / 1e3, 'dur':(end - start) / 1e3, 'pid':pid, 'tid':1}
+            for name, start, end in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents':trace, 'displayTimeUnit':'ms'}, f)
@@ -0,0 +1,237 @@
+"""
+Description: Replay logs for the Python PWR Sim. Every turn of a game is
+appended to a binary log as one fixed size record holding the control
+inputs, the damage control setting going into the turn and the packed
+PlantState that came out of it. Because every record is the same size the
+log can be memory mapped and the record for any day found by offset
+without reading the rest of the file. Records are only ever appended and
+flushed one at a time, so a crash loses at most the turn being written.
+
+Every ReplayWriter starts a new session with a session start record, so
+several games recorded to the same path stay apart: replay() starts a
+fresh plant at each one and forDay() looks in one session (the last by
+default). Finding the last session only reads back from the end of the
+log to its start record, listing every session (sessions(), or forDay()
+for an older one) reads the day of every record once. Version 1 logs
+have no session records and are one session.
+
+Layout:
+    header: 8 byte magic, int32 version, int32 gameLength
+    record: int32 day the turn started on, 4 x uint8 controls,
+            bool damageControl before the turn, packed PlantState after it.
+            A session start record has day SESSION_START, zero controls
+            and the new game's starting state
+
+Usage:
+    python -m pwrsim.replay session.pwrlog          re-run the log and check every turn
+    python -m pwrsim.replay session.pwrlog --day 42 print one day of the last session, --session N for another
+
+Classes:
+    ReplayWriter(path, gameLength)
+        Description: Appends turns to a log, creating it with a header if needed
+        Methods:
+            record(controls, damageControl, rState): Append one turn
+            close(): Close the file
+    ReplayLog(path)
+        Description: Memory mapped read only view of a log
+        Methods:
+            __len__(): Number of complete records
+            __getitem__(i): Returns (day, controls, damageControl, PlantState) for record i, session start records included
+            sessions(): Returns a list of (first, end) record index ranges of the turns of each session
+            lastSession(): Returns the (first, end) range of the last session, None for an empty log
+            forDay(day, session): Returns the record for the turn that started on day in that session (default the last), KeyError if missing
+            close(): Unmap and close the file
+Functions:
+    replay(path): Re-runs a log headless, returns list of (day, field names) for every turn that did not match
+"""
+import argparse
+import mmap
+import os
+import struct
+
+from pwrsim import core
+from pwrsim.state import FIELDS, RECORD, STATE_SIZE, PlantState
+
+MAGIC = b'PWRLOG\x00\x00'
+VERSION = 2     #version 1 had no session start records
+VERSIONS = (1, 2)   #versions ReplayLog can read
+SESSION_START = -1  #day of a session start record, turns start on day 1
+HEADER = struct.Struct('<8sii')
+TURN = struct.Struct('<i4B?')
+RECORD_SIZE = TURN.size + STATE_SIZE
+
+
+class ReplayWriter():
+    def __init__(self, path, gameLength):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, 'ab')
+        if exists:  #appending to an existing log, make sure it is the same kind of game
+            with open(path, 'rb') as f:
+                magic, version, logLength = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or logLength != gameLength:
+                self.file.close()
+                raise ValueError(path + ' is not a replay log for a ' + str(gameLength) + ' day game')
+            size = os.path.getsize(path)
+            torn = (size - HEADER.size) % RECORD_SIZE
+            if torn:    #drop a half written record from a crash
+                self.file.truncate(size - torn)
+        else:
+            self.file.write(HEADER.pack(MAGIC, VERSION, gameLength))
+        self.buffer = bytearray(RECORD_SIZE)
+        TURN.pack_into(self.buffer, 0, SESSION_START, 0, 0, 0, 0, False)    #every writer is a new game
+        core.newState(gameLength).packInto(self.buffer, TURN.size)
+        self.file.write(self.buffer)
+        self.file.flush()
+
+    def record(self, controls, damageControl, rState):
+        rodPosition, pPump, sPump, ePump = controls
+        TURN.pack_into(self.buffer, 0, rState.day - 1, rodPosition, pPump, sPump, ePump, damageControl)
+        rState.packInto(self.buffer, TURN.size)
+        self.file.write(self.buffer)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ReplayLog():
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.gameLength = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or self.version not in VERSIONS:
+            self.close()
+            raise ValueError(path + ' is not a replay log')
+        self.count = (len(self.map) - HEADER.size) // RECORD_SIZE    #a torn last record is ignored
+        self.sessionRanges = None   #found on first use, only a day field per record is read
+        self.lastRange = None
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, i):
+        if i < 0:
+            i += self.count
+        if i < 0 or i >= self.count:
+            raise IndexError('replay record out of range')
+        return HEADER.size + i * RECORD_SIZE
+
+    def __getitem__(self, i):
+        offset = self.offset(i)
+        day, rodPosition, pPump, sPump, ePump, damageControl = TURN.unpack_from(self.map, offset)
+        return (day, (rodPosition, pPump, sPump, ePump), damageControl, PlantState.fromBuffer(self.map, offset + TURN.size))
+
+    def stateBytes(self, i):    #packed state after turn i, a view into the map with no copy
+        offset = self.offset(i) + TURN.size
+        return memoryview(self.map)[offset:offset + STATE_SIZE]
+
+    def day(self, i):
+        return TURN.unpack_from(self.map, self.offset(i))[0]
+
+    def sessions(self):
+        if self.sessionRanges is None:
+            if self.version == 1:
+                self.sessionRanges = [(0, self.count)]
+            else:
+                starts = [i for i in range(self.count) if self.day(i) == SESSION_START]
+                ends = starts[1:] + [self.count]
+                self.sessionRanges = [(start + 1, end) for start, end in zip(starts, ends)]
+        return self.sessionRanges
+
+    def lastSession(self):  #scans back from the end, so it costs the length of the last session not the whole log
+        if self.lastRange is None:
+            if self.version == 1:
+                self.lastRange = (0, self.count)
+            else:
+                start = self.count - 1
+                while start >= 0 and self.day(start) != SESSION_START:
+                    start -= 1
+                if start < 0:   #every version 2 log starts with a session record, so only an empty one has none
+                    return None
+                self.lastRange = (start + 1, self.count)
+        return self.lastRange
+
+    def forDay(self, day, session=-1):
+        #turns advance the day by one so the record is normally day - 1 past the session's first, fall back to a search if the log skips
+        if session == -1:
+            found = self.lastSession()
+        else:
+            sessions = self.sessions()
+            found = sessions[session] if -len(sessions) <= session < len(sessions) else None
+        if found is None:
+            raise KeyError('no turn recorded for day ' + str(day))
+        first, end = found
+        guess = first + day - 1
+        if first <= guess < end and self.day(guess) == day:
+            return self[guess]
+        low = first
+        high = end - 1
+        while low <= high:
+            mid = (low + high) // 2
+            midDay = self.day(mid)
+            if midDay == day:
+                return self[mid]
+            if midDay < day:
+                low = mid + 1
+            else:
+                high = mid - 1
+        raise KeyError('no turn recorded for day ' + str(day))
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def replay(path):
+    log = ReplayLog(path)
+    rState = core.newState(log.gameLength)
+    packed = bytearray(STATE_SIZE)
+    mismatches = []
+    try:
+        for i in range(len(log)):
+            day, rodPosition, pPump, sPump, ePump, damageControl = TURN.unpack_from(log.map, log.offset(i))
+            if day == SESSION_START:    #a new game starts here
+                rState = core.newState(log.gameLength)
+                continue
+            rState.damageControl = damageControl
+            core.stepState(rState, rodPosition, pPump, sPump, ePump)
+            rState.packInto(packed)
+            recorded = log.stateBytes(i)
+            if packed != recorded:
+                ours = RECORD.unpack(packed)
+                theirs = RECORD.unpack(recorded)
+                mismatches.append((day, [field for field, a, b in zip(FIELDS, ours, theirs) if a != b]))
+                rState = PlantState.fromBuffer(recorded)     #pick up from the recorded state so one change doesn't flag every later turn
+            recorded.release()
+    finally:
+        log.close()
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check or inspect a PWR sim replay log.')
+    parser.add_argument('log', help='replay log file')
+    parser.add_argument('--day', type=int, default=None, help='print the turn that started on this day instead of replaying')
+    parser.add_argument('--session', type=int, default=-1, help='session to look in with --day, counted from 0 (default: the last)')
+    args = parser.parse_args(argv)
+
+    if args.day is not None:
+        log = ReplayLog(args.log)
+        try:
+            day, controls, damageControl, rState = log.forDay(args.day, args.session)
+        finally:
+            log.close()
+        print('Day', day, 'rods/primary/secondary/emergency =', controls, 'damage control =', damageControl)
+        for field in FIELDS:
+            print('   ', field, '=', rState[field])
+        return 0
+
+    mismatches = replay(args.log)
+    for day, fields in mismatches:
+        print('Day', day, 'differs in', ', '.join(fields))
+    print(len(mismatches), 'mismatched turns')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,286 @@
+"""
+Description: Asyncio control server for the Python PWR Sim. Runs any number
+of headless plants in one process behind a TCP or Unix socket speaking
+line delimited JSON, so trainees or scripts can operate plants remotely
+instead of each needing their own Tk window.
+
+Protocol: every request is one JSON object per line with an "op" and an
+optional "id" that is echoed back in the reply. Replies carry "ok": true
+plus results, or "ok": false and an "error" string. Plant ids and every
+count or control value must be JSON integers (not true/false). Request
+lines are capped at MAX_LINE bytes, a longer line is skipped and answered
+with an error. A request that fails in any way only fails itself, the
+connection and its plants stay up.
+    {"op": "create", "gameLength": 100}               -> {"plant": 1, "state": {...}}
+    {"op": "control", "plant": 1, "rodPosition": 15, "pPump": 100, "sPump": 100, "ePump": 0}
+    {"op": "step", "plant": 1, "days": 1}             -> {"state": {...}, "annunciators": [...], "events": [...]}
+    {"op": "damageControl", "plant": 1}               -> {"event": "damage control activated"}
+    {"op": "state", "plant": 1}                       -> {"state": {...}, "annunciators": [...]}
+    {"op": "endStats", "plant": 1}                    -> {"stats": {...}}
+    {"op": "subscribe", "plant": 1} / {"op": "unsubscribe", "plant": 1}
+    {"op": "close", "plant": 1}
+Subscribers get {"update": 1, "state": {...}, "annunciators": [...], "events": [...]}
+lines whenever the plant steps. Plants are closed when the connection that
+created them goes away.
+
+Backpressure: a step is played as soon as its request is read, with the
+held controls fast path of PWRCore.advance. Replies are written with
+drain(), so a client that stops reading only stalls its own requests. Subscription updates are coalesced per plant, a
+slow subscriber gets the latest state (with the events it missed, up to
+MAX_PENDING_EVENTS) instead of a growing queue, and stepping never waits
+on any subscriber.
+
+Usage:
+    python -m pwrsim.server --port 8765
+    python -m pwrsim.server --unix /tmp/pwrsim.sock
+
+Classes:
+    PlantServer()
+        Description: Plant sessions and subscriptions
+        Methods:
+            handleClient(reader, writer): asyncio stream callback for one connection
+    Connection(server, writer)
+        Description: One client connection and its coalesced update outbox
+Functions:
+    serve(host, port, unixPath): Starts the server and runs until cancelled
+"""
+import argparse
+import asyncio
+import json
+import traceback
+
+from pwrsim import core
+
+MAX_PENDING_EVENTS = 100    #events kept per plant for a subscriber that is behind
+MAX_LINE = 2**16    #longest request line in bytes, the asyncio stream default
+CONTROLS = ('rodPosition', 'pPump', 'sPump', 'ePump')
+
+
+class RequestError(Exception):  #bad request, reported back to the client
+    pass
+
+
+async def readRequest(reader):     #next request line, b'' at end of stream, None for a line over MAX_LINE which is skipped
+    try:
+        return await reader.readuntil(b'\n')
+    except asyncio.IncompleteReadError as err:  #last line without a newline
+        return err.partial
+    except asyncio.LimitOverrunError as err:
+        consumed = err.consumed
+    while True:     #throw the rest of the line away, up to and including its newline
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b'\n')
+            return None
+        except asyncio.IncompleteReadError:
+            return b''
+        except asyncio.LimitOverrunError as err:
+            consumed = err.consumed
+
+def isInteger(value):   #JSON integer, bool is a subclass of int in Python but true/false are not numbers
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Session():
+    def __init__(self, plantId, gameLength, owner):
+        self.plantId = plantId
+        self.core = core.PWRCore(gameLength)
+        self.controls = (0, 0, 0, 0)
+        self.owner = owner
+        self.subscribers = set()
+
+    def snapshot(self):
+        return {'state':self.core.rState.asDict(), 'annunciators':list(core.annunciators(self.core.rState))}
+
+
+class Connection():
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.owned = set()
+        self.subscriptions = set()
+        self.updates = {}   #plant id -> latest update not yet sent
+        self.wake = asyncio.Event()
+        self.sender = asyncio.get_running_loop().create_task(self.sendUpdates())
+
+    async def reply(self, message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    def push(self, session, events):    #queue an update, replacing one the client has not been sent yet
+        update = self.updates.get(session.plantId)
+        if update is None:
+            update = {'update':session.plantId, 'events':[]}
+            self.updates[session.plantId] = update
+        update.update(session.snapshot())
+        update['events'].extend(events)
+        del update['events'][:-MAX_PENDING_EVENTS]
+        self.wake.set()
+
+    async def sendUpdates(self):
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            updates = self.updates
+            self.updates = {}
+            self.writer.write(b''.join(json.dumps(update).encode() + b'\n' for update in updates.values()))
+            await self.writer.drain()
+
+
+class PlantServer():
+    def __init__(self):
+        self.sessions = {}
+        self.nextId = 1
+
+    async def handleClient(self, reader, writer):
+        connection = Connection(self, writer)
+        try:
+            while True:
+                line = await readRequest(reader)
+                if line is None:
+                    await connection.reply({'ok':False, 'error':'request line over ' + str(MAX_LINE) + ' bytes'})
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                requestId = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError('request must be a JSON object')
+                    requestId = request.get('id')
+                    result = await self.dispatch(connection, request)
+                    result['ok'] = True
+                except RequestError as err:
+                    result = {'ok':False, 'error':str(err)}
+                except ValueError:
+                    result = {'ok':False, 'error':'invalid JSON'}
+                except Exception as err:    #a server bug fails this request, not the connection and the plants it owns
+                    traceback.print_exc()
+                    result = {'ok':False, 'error':'internal error: ' + type(err).__name__}
+                if requestId is not None:
+                    result['id'] = requestId
+                await connection.reply(result)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            connection.sender.cancel()
+            for plantId in connection.subscriptions:
+                session = self.sessions.get(plantId)
+                if session is not None:
+                    session.subscribers.discard(connection)
+            for plantId in connection.owned:
+                self.closeSession(plantId)
+            writer.close()
+
+    def session(self, request):
+        plantId = request.get('plant')
+        if not isInteger(plantId):
+            raise RequestError('plant must be an integer plant id')
+        session = self.sessions.get(plantId)
+        if session is None:
+            raise RequestError('no such plant')
+        return session
+
+    def closeSession(self, plantId):
+        session = self.sessions.pop(plantId, None)
+        if session is not None:
+            for subscriber in session.subscribers:
+                subscriber.subscriptions.discard(plantId)
+
+    async def dispatch(self, connection, request):
+        op = request.get('op')
+        if op == 'create':
+            gameLength = request.get('gameLength', 100)
+            if not isInteger(gameLength) or gameLength < 5 or gameLength > 150:
+                raise RequestError('gameLength must be an integer between 5 and 150')
+            session = Session(self.nextId, gameLength, connection)
+            self.nextId += 1
+            self.sessions[session.plantId] = session
+            connection.owned.add(session.plantId)
+            result = session.snapshot()
+            result['plant'] = session.plantId
+            return result
+        if op == 'control':
+            session = self.session(request)
+            controls = []
+            for name in CONTROLS:
+                value = request.get(name, session.controls[len(controls)])
+                if not isInteger(value) or value < 0 or value > 100:
+                    raise RequestError(name + ' must be an integer between 0 and 100')
+                controls.append(value)
+            session.controls = tuple(controls)
+            return {'controls':dict(zip(CONTROLS, session.controls))}
+        if op == 'step':
+            session = self.session(request)
+            days = request.get('days', 1)
+            if not isInteger(days) or days < 1:
+                raise RequestError('days must be a positive integer')
+            plant = session.core
+            if plant.isOver() or plant.rState.damage >= 100:
+                raise RequestError('game over')
+            days = min(days, plant.rState.gameLength - plant.rState.day)
+            events = plant.advance(days, *session.controls)
+            self.publish(session, events)
+            result = session.snapshot()
+            result['events'] = events
+            return result
+        if op == 'damageControl':
+            session = self.session(request)
+            event = session.core.toggleDamageControl()
+            self.publish(session, [event])
+            return {'event':event}
+        if op == 'state':
+            return self.session(request).snapshot()
+        if op == 'endStats':
+            return {'stats':self.session(request).core.endStats()}
+        if op == 'subscribe':
+            session = self.session(request)
+            session.subscribers.add(connection)
+            connection.subscriptions.add(session.plantId)
+            return session.snapshot()
+        if op == 'unsubscribe':
+            session = self.session(request)
+            session.subscribers.discard(connection)
+            connection.subscriptions.discard(session.plantId)
+            return {}
+        if op == 'close':
+            session = self.session(request)
+            if session.owner is not connection:
+                raise RequestError('only the connection that created a plant can close it')
+            connection.owned.discard(session.plantId)
+            self.closeSession(session.plantId)
+            return {}
+        raise RequestError('unknown op ' + repr(op))
+
+    def publish(self, session, events):
+        for subscriber in session.subscribers:
+            subscriber.push(session, events)
+
+
+async def serve(host='127.0.0.1', port=8765, unixPath=None):
+    server = PlantServer()
+    if unixPath is not None:
+        listener = await asyncio.start_unix_server(server.handleClient, path=unixPath, limit=MAX_LINE)
+    else:
+        listener = await asyncio.start_server(server.handleClient, host, port, limit=MAX_LINE)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve headless PWR sim plants over line delimited JSON.')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    parser.add_argument('--unix', default=None, help='listen on this Unix socket path instead of TCP')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
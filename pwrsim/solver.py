@@ -0,0 +1,179 @@
+"""
+Description: Schedule solver for the Python PWR Sim. Searches for the day
+by day control schedule with the highest endScreen TrueProfit for a given
+game length using beam search over the core.stepState dynamics.
+
+Pruning:
+    - pPump and ePump only matter through their sum, apart from the
+      pPump > 20 or ePump > 40 nudge when the core is exactly balanced,
+      so the search steps over total coolant flow and fills the primary
+      pumps first instead of searching both channels.
+    - Controls are searched on a coarse grid (see solve() arguments).
+    - Plants that would be destroyed, or that a full shutdown could no
+      longer save before the game ends, are dropped. The full shutdown is
+      always one of the searched actions, whatever the grids, so a kept
+      plant can always be saved.
+    - Candidates are merged on a quantized (rTemp, fuel, damage,
+      dailyOutput) key keeping the most profitable one, then only the best
+      beamWidth survive each day. Candidates are ranked by TrueProfit so
+      far plus a small credit for stored core heat (so warm up days are
+      not pruned before they pay off) minus a risk charge for damage that
+      shrinks as the game runs out.
+Transitions are not memoized: beam states carry exact floats and almost
+never repeat, and snapping them onto the bucket grid so they would costs
+far more TrueProfit than the steps it saves. Shutdown checks are memoized
+per degree of core temp, those do repeat. Damage control is not used by
+the solver.
+
+The returned schedule is replayed through core.playGame so the reported
+TrueProfit is exactly what the game would show. If every branch is lost
+before the last day the search stops there and the rest of the schedule
+is the full shutdown, stoppedEarly in the result is the day it stopped
+(None for a full search).
+
+Usage:
+    python -m pwrsim.solver --length 100 --beam 32
+
+Functions:
+    solve(gameLength, rods, flows, secondaries, beamWidth, quantum, maxCache): Returns dict with schedule, stats, stoppedEarly
+        and search counters, maxCache bounds the shutdown check memo
+"""
+import argparse
+import heapq
+import math
+import time
+
+from pwrsim import core
+from pwrsim.state import PlantState
+
+
+#beam ranking weights, tuned against the best constant schedules from pwrsim.sweep
+HEAT_VALUE = 1.4 * 140 * 0.05   #$ per remaining day per degree of core heat
+HEAT_CAP = 700  #heat past the reactor damage limit earns nothing
+DAMAGE_RISK = 400   #$ per remaining day per point of damage
+SHUTDOWN = (0, 100, 100, 100)  #rods in, every pump at full
+
+def controlsFor(rod, flow, secondary):  #fill the primary pumps first, overflow goes to the emergency pumps
+    primary = min(flow, 100)
+    return (rod, primary, secondary, flow - primary)
+
+def profitSoFar(totalOutput, fuel, damage):     #endScreen TrueProfit if the game ended now
+    return totalOutput * 1000 * 0.14 - (100 - fuel) * 1000 - damage * 1000
+
+def survivesShutdown(rTemp, damage, remaining, doomCache):
+    #True if a full shutdown from here keeps damage under 100 until the game ends.
+    #rTemp is rounded up to the next degree so nearby states share one check and the answer stays on the safe side
+    rTemp = math.ceil(rTemp)
+    key = (rTemp, damage, remaining)
+    safe = doomCache.get(key)
+    if safe is None:
+        state = PlantState()
+        state.rTemp = rTemp
+        state.damage = damage
+        safe = True
+        for day in range(remaining):
+            before = state.damage
+            core.stepState(state, *SHUTDOWN)
+            if state.damage >= 100:
+                safe = False
+                break
+            if state.damage == before:  #a day without damage while cooling means no more damage from here on
+                break
+        doomCache[key] = safe
+    return safe
+
+def scheduleFrom(path):     #unwind the (controls, parent) links into a list
+    schedule = []
+    while path is not None:
+        schedule.append(path[0])
+        path = path[1]
+    schedule.reverse()
+    return schedule
+
+def solve(gameLength, rods=range(0, 101, 10), flows=range(0, 201, 25), secondaries=range(0, 101, 20),
+        beamWidth=16, quantum=(1.0, 0.5, 5.0), maxCache=500000):
+    actions = [controlsFor(rod, flow, secondary) for rod in rods for flow in flows for secondary in secondaries]
+    if SHUTDOWN not in actions:     #the shutdown pruning counts on it being playable
+        actions.append(SHUTDOWN)
+    rStep, fuelStep, outputStep = quantum
+    doomCache = {}
+    steps = 0
+
+    start = PlantState(gameLength)
+    scratch = PlantState(gameLength)
+    beam = [(0.0, start, None)]     #(score, state, path)
+    stoppedEarly = None
+    for turn in range(gameLength - 1):
+        remaining = gameLength - 2 - turn
+        candidates = {}
+        for score, state, path in beam:
+            for action in actions:
+                scratch.rTemp = state.rTemp     #only the fields stepState reads need loading
+                scratch.fuel = state.fuel
+                scratch.damage = state.damage
+                scratch.dailyOutput = state.dailyOutput
+                core.stepState(scratch, *action)
+                steps += 1
+                result = (scratch.rTemp, scratch.eTemp, scratch.cTemp, scratch.damage, scratch.fuel, scratch.dailyOutput)
+                if len(doomCache) >= maxCache:
+                    doomCache.clear()
+
+                rTemp, eTemp, cTemp, damage, fuel, dailyOutput = result
+                if damage >= 100 or not survivesShutdown(rTemp, damage, remaining, doomCache):     #plant destroyed or past saving
+                    continue
+                totalOutput = state.totalOutput + dailyOutput
+                newScore = profitSoFar(totalOutput, fuel, damage) + HEAT_VALUE * remaining * (min(rTemp, HEAT_CAP) - 70) - DAMAGE_RISK * remaining * damage
+                bucket = (round(rTemp / rStep), round(fuel / fuelStep), damage, round(dailyOutput / outputStep))
+                best = candidates.get(bucket)
+                if best is None or newScore > best[0]:
+                    candidates[bucket] = (newScore, state, path, action, result, totalOutput)
+
+        previous = beam
+        survivors = heapq.nlargest(beamWidth, candidates.values(), key=lambda c: c[0])
+        beam = []
+        for newScore, state, path, action, result, totalOutput in survivors:   #only build full states for the survivors
+            nextState = state.copy()
+            nextState.rodPosition, nextState.pPump, nextState.sPump, nextState.ePump = action
+            nextState.rTemp, nextState.eTemp, nextState.cTemp, nextState.damage, nextState.fuel, nextState.dailyOutput = result
+            nextState.totalOutput = totalOutput
+            nextState.day += 1
+            beam.append((newScore, nextState, (action, path)))
+        if not beam:    #every branch destroys the plant, stop with the best schedule so far
+            beam = previous
+            stoppedEarly = turn + 1
+            break
+
+    bestScore, bestState, bestPath = max(beam, key=lambda c: c[0])
+    schedule = scheduleFrom(bestPath)
+    schedule.extend([SHUTDOWN] * (gameLength - 1 - len(schedule)))  #shut down for the days the search never reached
+    plant = core.playGame(gameLength, schedule) if schedule else core.PWRCore(gameLength)
+    return {'schedule':schedule, 'stats':plant.endStats(), 'rState':plant.rState, 'steps':steps, 'shutdownChecks':len(doomCache),
+        'stoppedEarly':stoppedEarly}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find the highest TrueProfit control schedule for a game length.')
+    parser.add_argument('--length', type=int, default=100, help='game length in days (min:5 max:150)')
+    parser.add_argument('--beam', type=int, default=16, help='plant states kept per day')
+    parser.add_argument('--rod-step', type=int, default=10, help='control rod grid spacing')
+    parser.add_argument('--flow-step', type=int, default=25, help='primary plus emergency flow grid spacing (0-200)')
+    parser.add_argument('--secondary-step', type=int, default=20, help='secondary pump grid spacing')
+    args = parser.parse_args(argv)
+    if args.length < 5 or args.length > 150:
+        parser.error('Game length must be between 5 and 150 days.')
+
+    began = time.perf_counter()
+    result = solve(args.length, range(0, 101, args.rod_step), range(0, 201, args.flow_step), range(0, 101, args.secondary_step), args.beam)
+    elapsed = time.perf_counter() - began
+
+    for turn, controls in enumerate(result['schedule']):
+        print('Day', turn + 1, 'rods/primary/secondary/emergency =', controls)
+    if result['stoppedEarly'] is not None:
+        print('Search ran out of safe plants on day', result['stoppedEarly'], 'and shuts down from there')
+    print('True Profit = $' + format(result['stats']['TrueProfit']/1000000, '.2f') + 'Mil', 'ending damage', result['rState'].damage, '%')
+    print('Solved in', format(elapsed, '.2f'), 's,', result['steps'], 'transitions stepped,', result['shutdownChecks'], 'shutdown checks memoized')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
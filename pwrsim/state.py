@@ -0,0 +1,124 @@
+"""
+Description: Fixed layout plant state for the Python PWR Sim. PlantState
+uses __slots__ with the same fields as the old rState dict, so a saved
+snapshot costs a few hundred bytes less than a dict and field reads in
+the hot loop are plain attribute lookups. Each state also packs into a
+fixed size little endian record (STATE_SIZE bytes) that can be written
+into or read straight out of a bytearray, mmap or memoryview without
+building intermediate bytes objects.
+
+Classes:
+    PlantState(gameLength)
+        Description: One plant's state
+        Methods:
+            copy(): Returns an independent copy
+            astuple(): Returns the field values in FIELDS order
+            asDict(): Returns the old style rState dict
+            toBytes(): Returns the packed record
+            packInto(buffer, offset): Writes the packed record into a writable buffer
+            fromBuffer(buffer, offset): classmethod, reads a packed record out of a buffer
+            fromDict(rState): classmethod, builds a state from an rState dict
+"""
+import struct
+from operator import attrgetter
+
+#field order is the order of the old rState dict keys
+FIELDS = ('rodPosition', 'pPump', 'sPump', 'ePump', 'rTemp', 'eTemp', 'cTemp', 'damage', 'fuel',
+    'dailyOutput', 'totalOutput', 'day', 'damageControl', 'scram', 'gameLength')
+RECORD = struct.Struct('<4i3dq3di??i')   #packed layout, no padding
+STATE_SIZE = RECORD.size
+
+_getFields = attrgetter(*FIELDS)
+
+
+class PlantState():
+    __slots__ = FIELDS
+
+    def __init__(self, gameLength=100):
+        self.rodPosition = 0
+        self.pPump = 0
+        self.sPump = 0
+        self.ePump = 0
+        self.rTemp = 70.0
+        self.eTemp = 80.0
+        self.cTemp = 80.0
+        self.damage = 0
+        self.fuel = 100.0
+        self.dailyOutput = 0
+        self.totalOutput = 0
+        self.day = 1
+        self.damageControl = False
+        self.scram = False
+        self.gameLength = gameLength
+
+    def astuple(self):
+        return _getFields(self)
+
+    def copy(self):
+        new = PlantState.__new__(PlantState)
+        new.rodPosition = self.rodPosition
+        new.pPump = self.pPump
+        new.sPump = self.sPump
+        new.ePump = self.ePump
+        new.rTemp = self.rTemp
+        new.eTemp = self.eTemp
+        new.cTemp = self.cTemp
+        new.damage = self.damage
+        new.fuel = self.fuel
+        new.dailyOutput = self.dailyOutput
+        new.totalOutput = self.totalOutput
+        new.day = self.day
+        new.damageControl = self.damageControl
+        new.scram = self.scram
+        new.gameLength = self.gameLength
+        return new
+
+    def __eq__(self, other):
+        if not isinstance(other, PlantState):
+            return NotImplemented
+        return _getFields(self) == _getFields(other)
+
+    __hash__ = None     #mutable, do not use as a dict key
+
+    def __repr__(self):
+        return 'PlantState(' + ', '.join(field + '=' + repr(value) for field, value in zip(FIELDS, _getFields(self))) + ')'
+
+    #dict style access so code written against the old rState dict keeps working
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def keys(self):
+        return FIELDS
+
+    def asDict(self):
+        return dict(zip(FIELDS, _getFields(self)))
+
+    def toBytes(self):
+        return RECORD.pack(*_getFields(self))
+
+    __bytes__ = toBytes
+
+    def packInto(self, buffer, offset=0):
+        RECORD.pack_into(buffer, offset, *_getFields(self))
+
+    @classmethod
+    def fromTuple(cls, values):
+        new = cls.__new__(cls)
+        for field, value in zip(FIELDS, values):
+            setattr(new, field, value)
+        return new
+
+    @classmethod
+    def fromBuffer(cls, buffer, offset=0):
+        return cls.fromTuple(RECORD.unpack_from(buffer, offset))
+
+    @classmethod
+    def fromDict(cls, rState):
+        return cls.fromTuple([rState[field] for field in FIELDS])
@@ -0,0 +1,221 @@
+"""
+Description: Command line parameter sweep for the Python PWR Sim. Plays a
+grid or a random sample of control schedules headless across a process
+pool and reports the endScreen economics for each one. A schedule is a
+(rodPosition, pPump, sPump, ePump) tuple held for the whole game.
+
+Work is handed to the pool in chunks, every finished chunk is appended to
+a JSON lines file and flushed straight away, and rerunning the same
+command skips every schedule already in the file, so an interrupted sweep
+picks up where it stopped. Every result records the game length and the
+plant it was played on (a config's name and a hash of its constants) and
+only results with the same length and plant count as done, so sweeps with
+different --length or --config can share one file. At most a few chunks
+per worker are handed out ahead of the results coming back, so a sweep
+of any size never has the whole schedule list in memory. With --history every game's day by day
+history is also saved as a pwrsim.history file in that directory, named
+after its schedule, for analysis without playing the games again. With
+--config the games are played on a plant variant from a pwrsim.config
+JSON or INI file, each worker compiles it once.
+
+Usage:
+    python -m pwrsim.sweep --length 100 --rod 0:100:5 --primary 50:100:10 --out sweep.jsonl
+    python -m pwrsim.sweep --length 150 --samples 100000 --seed 7 --workers 8
+    python -m pwrsim.sweep --config hot.ini --rod 0:30:1 --out hot.jsonl
+
+Functions:
+    parseValues(spec): Turns '0:100:10', '15' or '10,20,30' into a list of control values
+    gridSchedules(rods, primaries, secondaries, emergencies): Returns an iterator over every combination
+    randomSchedules(samples, seed): Returns an iterator over random schedules
+    runSchedule(gameLength, schedule, historyDir, config): Plays one game, returns its result dict
+    runSweep(schedules, gameLength, outPath, workers, chunkSize, progress, historyDir, config): Runs the sweep, returns number of new results
+    plantId(config): Returns the plant a result was played on, 'stock' or the config's name and constants hash
+    bestResult(outPath, gameLength, plant): Returns the best result in the file for that length and plant
+    main(argv): Command line entry point, returns 0 on good execution
+"""
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+
+from pwrsim import config as plantConfig
+from pwrsim import core
+from pwrsim.history import PlantHistory
+
+CONTROLS = ('rodPosition', 'pPump', 'sPump', 'ePump')
+CHUNKS_PER_WORKER = 4    #chunks handed out ahead per worker
+
+
+def parseValues(spec):
+    values = []
+    for part in spec.split(','):
+        if ':' in part:     #start:stop:step, stop is inclusive
+            bounds = [int(x) for x in part.split(':')]
+            step = bounds[2] if len(bounds) > 2 else 1
+            values.extend(range(bounds[0], bounds[1] + 1, step))
+        else:
+            values.append(int(part))
+    for value in values:
+        if value < 0 or value > 100:
+            raise ValueError('control values must be integers between 0 and 100, got ' + str(value))
+    return values
+
+def gridSchedules(rods, primaries, secondaries, emergencies):
+    return itertools.product(rods, primaries, secondaries, emergencies)
+
+def randomSchedules(samples, seed=None):
+    rng = random.Random(seed)
+    for i in range(samples):
+        yield (rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100))
+
+def historyPath(historyDir, schedule):
+    return os.path.join(historyDir, 'r{}_p{}_s{}_e{}.pwrhist'.format(*schedule))
+
+def plantId(config):    #'stock', or name:hash of the constants so an edited config with the same name is a different plant
+    if config is None:
+        return 'stock'
+    constants = json.dumps({key:value for key, value in config.items() if key != 'name'}, sort_keys=True)
+    return config.get('name', 'custom') + ':' + hashlib.sha1(constants.encode()).hexdigest()[:12]
+
+def resultKey(result):
+    return (result['gameLength'], result['plant']) + tuple(result[c] for c in CONTROLS)
+
+def runSchedule(gameLength, schedule, historyDir=None, config=None):
+    model = None if config is None else plantConfig.compileModel(config)    #compiled on the first call in each worker
+    if historyDir is None:
+        plant = core.playGame(gameLength, schedule, model=model)
+    else:   #recording every day means stepping every day, no fast path
+        history = PlantHistory(gameLength)
+        plant = core.playGame(gameLength, schedule, history=history, model=model)
+        history.save(historyPath(historyDir, schedule))
+    stats = plant.endStats()
+    result = dict(zip(CONTROLS, schedule))
+    result['gameLength'] = gameLength
+    result['plant'] = plantId(config)
+    result['day'] = plant.rState.day
+    result['damage'] = plant.rState.damage
+    result['totalOutput'] = plant.rState.totalOutput
+    result['Profit'] = stats['Profit']
+    result['TrueLosses'] = stats['TrueLosses']
+    result['TrueProfit'] = stats['TrueProfit']
+    return result
+
+def runChunk(task):     #worker side, plays every schedule in one chunk
+    gameLength, chunk, historyDir, config = task
+    return [runSchedule(gameLength, schedule, historyDir, config) for schedule in chunk]
+
+def loadFinished(outPath, gameLength, plant):   #schedules already played with this length and plant, drops a torn last line from an interrupted run
+    finished = set()
+    if not os.path.exists(outPath):
+        return finished
+    with open(outPath, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            f.truncate(end)
+        for line in data[:end].splitlines():
+            try:
+                key = resultKey(json.loads(line))
+            except (ValueError, KeyError, TypeError):    #lines from before results recorded their length and plant are not resumed
+                continue
+            if key[:2] == (gameLength, plant):
+                finished.add(key[2:])
+    return finished
+
+def chunked(schedules, finished, gameLength, chunkSize, historyDir=None, config=None):
+    chunk = []
+    for schedule in schedules:
+        schedule = tuple(schedule)
+        if schedule in finished:
+            continue
+        chunk.append(schedule)
+        if len(chunk) >= chunkSize:
+            yield (gameLength, chunk, historyDir, config)
+            chunk = []
+    if chunk:
+        yield (gameLength, chunk, historyDir, config)
+
+def runSweep(schedules, gameLength, outPath, workers=None, chunkSize=256, progress=None, historyDir=None, config=None):
+    finished = loadFinished(outPath, gameLength, plantId(config))
+    if historyDir is not None:
+        os.makedirs(historyDir, exist_ok=True)
+    tasks = chunked(schedules, finished, gameLength, chunkSize, historyDir, config)
+    window = CHUNKS_PER_WORKER * (workers or os.cpu_count() or 1)
+    pending = collections.deque()
+    written = 0
+
+    def save(results):  #stream each chunk to disk as soon as it is back
+        out.write(''.join(json.dumps(result) + '\n' for result in results))
+        out.flush()
+        return len(results)
+
+    with open(outPath, 'a') as out, multiprocessing.Pool(workers) as pool:
+        for task in tasks:  #only pull more schedules when there is room in the window
+            if len(pending) >= window:
+                written += save(pending.popleft().get())
+                if progress is not None:
+                    progress(written)
+            pending.append(pool.apply_async(runChunk, (task,)))
+        while pending:
+            written += save(pending.popleft().get())
+            if progress is not None:
+                progress(written)
+    return written
+
+def bestResult(outPath, gameLength=None, plant=None):    #None matches any length or plant
+    best = None
+    with open(outPath) as f:
+        for line in f:
+            result = json.loads(line)
+            if (gameLength is not None and result.get('gameLength') != gameLength) or (plant is not None and result.get('plant') != plant):
+                continue
+            if best is None or result['TrueProfit'] > best['TrueProfit']:
+                best = result
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep PWR control schedules and report endScreen economics.')
+    parser.add_argument('--length', type=int, default=100, help='game length in days (min:5 max:150)')
+    parser.add_argument('--rod', default='0:100:10', help='control rod values, start:stop:step or comma list')
+    parser.add_argument('--primary', default='0:100:10', help='primary coolant pump values')
+    parser.add_argument('--secondary', default='0:100:10', help='secondary coolant pump values')
+    parser.add_argument('--emergency', default='0', help='emergency coolant pump values')
+    parser.add_argument('--samples', type=int, default=0, help='play this many random schedules instead of the grid')
+    parser.add_argument('--seed', type=int, default=None, help='seed for --samples, use the same seed to resume')
+    parser.add_argument('--out', default='sweep_results.jsonl', help='JSON lines results file, appended to and resumed from')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--chunk', type=int, default=256, help='schedules per work chunk')
+    parser.add_argument('--history', default=None, help='also save every game\'s day by day history into this directory')
+    parser.add_argument('--config', default=None, help='plant variant to play, a pwrsim.config JSON or INI file')
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config is not None:
+        try:
+            config = plantConfig.loadConfig(args.config)
+        except (OSError, ValueError) as err:
+            parser.error(str(err))
+    if args.length < 5 or args.length > 150:
+        parser.error('Game length must be between 5 and 150 days.')
+    if args.samples > 0:
+        schedules = randomSchedules(args.samples, args.seed)
+    else:
+        try:
+            schedules = gridSchedules(parseValues(args.rod), parseValues(args.primary), parseValues(args.secondary), parseValues(args.emergency))
+        except ValueError as err:
+            parser.error(str(err))
+
+    written = runSweep(schedules, args.length, args.out, args.workers, args.chunk, historyDir=args.history, config=config)
+    print('Finished', written, 'new schedules, results in', args.out)
+    best = bestResult(args.out, args.length, plantId(config))
+    if best is not None:
+        print('Best schedule:', tuple(best[c] for c in CONTROLS), 'True Profit = $' + format(best['TrueProfit']/1000000, '.2f') + 'Mil')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+"""
+Description: Strip chart trends for the Python PWR Sim GUI. Plots reactor,
+exchanger and condensor temperature, daily output and damage on a Tk
+canvas one day at a time without ever redrawing the whole plot.
+
+Each pixel column of the plot is a bucket of one or more days. A bucket
+keeps the first, lowest, highest and last value of every series and is
+drawn as one line item per series (joined to the previous bucket, then
+down and up through the bucket's min and max), so a new day either
+creates a few items or moves the points of the ones in the last bucket.
+When the plot runs out of columns neighbouring buckets are merged in
+pairs and the plot is drawn again at half the scale, so the number of
+canvas items never grows past one per column per series however long
+auto run goes on. add() only updates the buckets, draw() pushes whatever
+changed to the canvas, so the GUI can add every day but draw once a frame.
+
+The 700F, 450F and 212F damage and boiling thresholds, the frame and the
+legend are drawn once as static items.
+
+Classes:
+    TrendChart(canvas, gameLength)
+        Description: Trend plot drawn on an existing canvas
+        Methods:
+            add(rState): Adds one day to the chart
+            draw(): Draws the buckets that changed since the last draw
+            resize(width, height): Redraws everything for a new canvas size
+            clear(): Drops every day, keeps the static items
+"""
+import math
+from operator import attrgetter
+
+#field, colour, full scale value and legend text. Temperatures share one scale so the thresholds line up with all three
+SERIES = (('rTemp', '#ff5050', 1000.0, 'Reactor'), ('eTemp', '#ffb030', 1000.0, 'Exchanger'),
+    ('cTemp', '#50a0ff', 1000.0, 'Condensor'), ('dailyOutput', '#50ff50', 1400.0, 'MWe'),
+    ('damage', '#ff50ff', 100.0, 'Damage'))
+THRESHOLDS = ((700, 'REACTOR DMG 700F'), (450, 'EXCH DMG 450F'), (212, 'BOILING 212F'))
+TEMP_SCALE = 1000.0
+COLUMN_PX = 2   #narrowest bucket in pixels
+MARGIN_LEFT = 4
+MARGIN_RIGHT = 4
+MARGIN_TOP = 16     #room for the legend
+MARGIN_BOTTOM = 4
+
+
+class TrendChart():
+    def __init__(self, canvas, gameLength, width=300, height=100):
+        self.canvas = canvas
+        self.gameLength = gameLength
+        self.values = attrgetter(*(series[0] for series in SERIES))
+        self.scales = tuple(series[2] for series in SERIES)
+        self.width = width
+        self.height = height
+        self.staticItems = []
+        self.buckets = []   #per bucket, per series [first, min, max, last]
+        self.items = []     #per bucket, tuple of line items or None until drawn
+        self.dirty = set()
+        self.days = 0
+        self.layout()
+
+    def layout(self):   #plot geometry, bucket size and the static items for the current canvas size
+        self.plotLeft = MARGIN_LEFT
+        self.plotRight = max(self.plotLeft + COLUMN_PX, self.width - MARGIN_RIGHT)
+        self.plotTop = MARGIN_TOP
+        self.plotBottom = max(self.plotTop + 1, self.height - MARGIN_BOTTOM)
+        self.maxColumns = max(1, (self.plotRight - self.plotLeft) // COLUMN_PX)
+        if not self.buckets:    #fit the whole game when we can
+            self.daysPerBucket = max(1, math.ceil(self.gameLength / self.maxColumns))
+        self.columns = min(self.maxColumns, max(len(self.buckets), math.ceil(self.gameLength / self.daysPerBucket)))
+        self.columnWidth = (self.plotRight - self.plotLeft) / self.columns
+
+        for item in self.staticItems:
+            self.canvas.delete(item)
+        self.staticItems = [self.canvas.create_rectangle(self.plotLeft, self.plotTop, self.plotRight, self.plotBottom, outline='#404040')]
+        for temp, text in THRESHOLDS:
+            y = self.y(temp, TEMP_SCALE)
+            self.staticItems.append(self.canvas.create_line(self.plotLeft, y, self.plotRight, y, fill='#606060', dash=(2, 4)))
+            self.staticItems.append(self.canvas.create_text(self.plotRight - 2, y - 1, text=text, anchor='se', fill='#808080', font=('TkDefaultFont', 7)))
+        x = self.plotLeft
+        for field, colour, scale, text in SERIES:
+            self.staticItems.append(self.canvas.create_text(x, 2, text=text, anchor='nw', fill=colour, font=('TkDefaultFont', 7)))
+            x += 8 + 6 * len(text)
+
+    def y(self, value, scale):
+        fraction = value / scale
+        if fraction < 0:
+            fraction = 0
+        elif fraction > 1:
+            fraction = 1
+        return self.plotBottom - fraction * (self.plotBottom - self.plotTop)
+
+    def add(self, rState):
+        index = self.days // self.daysPerBucket
+        if index >= self.columns:
+            self.compress()
+            index = self.days // self.daysPerBucket
+        if index == len(self.buckets):
+            self.buckets.append([[value, value, value, value] for value in self.values(rState)])
+            self.items.append(None)
+        else:
+            for stats, value in zip(self.buckets[index], self.values(rState)):
+                if value < stats[1]:
+                    stats[1] = value
+                if value > stats[2]:
+                    stats[2] = value
+                stats[3] = value
+        self.dirty.add(index)
+        self.days += 1
+
+    def compress(self):     #halve the time scale: merge buckets in pairs and draw everything again
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            pair = self.buckets[i:i + 2]
+            if len(pair) == 1:
+                merged.append(pair[0])
+            else:
+                merged.append([[a[0], min(a[1], b[1]), max(a[2], b[2]), b[3]] for a, b in zip(pair[0], pair[1])])
+        self.buckets = merged
+        self.daysPerBucket *= 2
+        self.deleteLines()
+        self.items = [None] * len(self.buckets)
+        self.dirty = set(range(len(self.buckets)))
+
+    def deleteLines(self):
+        for items in self.items:
+            if items is not None:
+                for item in items:
+                    self.canvas.delete(item)
+
+    def draw(self):
+        if not self.dirty:
+            return
+        canvas = self.canvas
+        for index in sorted(self.dirty):
+            x = self.plotLeft + index * self.columnWidth
+            bucket = self.buckets[index]
+            previous = self.buckets[index - 1] if index > 0 else bucket
+            items = self.items[index]
+            new = []
+            for series, (stats, before, scale) in enumerate(zip(bucket, previous, self.scales)):
+                first, low, high, last = stats
+                if index > 0:
+                    start = (x - self.columnWidth, self.y(before[3], scale))
+                else:
+                    start = (x, self.y(first, scale))
+                points = start + (x, self.y(first, scale), x, self.y(low, scale), x, self.y(high, scale), x, self.y(last, scale))
+                if items is None:
+                    new.append(canvas.create_line(*points, fill=SERIES[series][1]))
+                else:
+                    canvas.coords(items[series], *points)
+            if items is None:
+                self.items[index] = tuple(new)
+        self.dirty.clear()
+
+    def resize(self, width, height):
+        if width == self.width and height == self.height:
+            return
+        self.width = width
+        self.height = height
+        self.deleteLines()
+        self.items = [None] * len(self.buckets)
+        self.layout()
+        while len(self.buckets) > self.columns:     #a narrower plot may need coarser buckets
+            self.compress()
+        self.dirty = set(range(len(self.buckets)))
+        self.draw()
+
+    def clear(self):
+        self.deleteLines()
+        self.buckets = []
+        self.items = []
+        self.dirty = set()
+        self.days = 0
+        self.layout()